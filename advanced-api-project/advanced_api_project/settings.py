@@ -38,7 +38,6 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'advanced_app',
     'api',
 ]
 
@@ -52,6 +51,19 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+REST_FRAMEWORK = {
+    # Token buckets per user/address, see api.throttling
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.TokenBucketThrottle'],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '300/min',
+        'user': '1200/min',
+    },
+}
+
+# Cache alias to keep throttle buckets in when running several workers;
+# None keeps them in process.
+API_THROTTLE_CACHE_ALIAS = None
+
 ROOT_URLCONF = 'advanced_api_project.urls'
 
 TEMPLATES = [
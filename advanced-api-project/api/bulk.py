@@ -0,0 +1,169 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .cache import bump_version
+from .models import Author, Book, BookChange
+from .serializers import BookImportSerializer
+
+
+# ------------------------------------------------
+# Bulk import/export of books
+# Rows are read straight off the request stream, validated and written one
+# chunk at a time, so memory stays flat however big the upload is. A bad row
+# is reported by line number and skipped; it never fails the rest of the file.
+# ------------------------------------------------
+FORMATS = ('csv', 'ndjson')
+EXPORT_FIELDS = ('id', 'title', 'publication_year', 'author')
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_ndjson(lines):
+    """Yield ``(line_number, row, error)`` for an NDJSON byte stream."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except (UnicodeDecodeError, ValueError) as exc:
+            yield number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {'non_field_errors': ['Expected a JSON object.']}
+            continue
+        yield number, row, None
+
+
+def read_csv(lines):
+    """Yield ``(line_number, row, error)`` for a CSV byte stream with a header row."""
+    undecodable = []
+
+    def decode(lines):
+        for number, line in enumerate(lines, start=1):
+            try:
+                yield line.decode('utf-8-sig')
+            except UnicodeDecodeError as exc:
+                # A blank line in its place keeps the reader's line count right.
+                undecodable.append((number, None, {'non_field_errors': [f'Unreadable CSV: {exc}']}))
+                yield '\n'
+
+    # Rows are read one at a time so a bad row is reported and skipped.
+    reader = csv.DictReader(decode(lines))
+    while True:
+        try:
+            row, error = next(reader), None
+        except StopIteration:
+            break
+        except csv.Error as exc:
+            row, error = None, {'non_field_errors': [f'Unreadable CSV: {exc}']}
+        else:
+            # Cells past the header end up under the None key.
+            row.pop(None, None)
+        yield from undecodable
+        undecodable.clear()
+        yield reader.line_num, row, error
+    yield from undecodable
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': detail})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_books(rows, chunk_size=1000):
+    """
+    Validate and insert ``(line_number, row, error)`` tuples, ``chunk_size`` at
+    a time: one author lookup and one ``bulk_create`` transaction per chunk.
+    """
+    report = ImportReport()
+    serializer = BookImportSerializer()
+    for chunk in chunked(rows, chunk_size):
+        valid = []
+        for line, row, error in chunk:
+            if error is not None:
+                report.error(line, error)
+                continue
+            try:
+                valid.append((line, serializer.run_validation(row)))
+            except ValidationError as exc:
+                report.error(line, exc.detail)
+
+        author_ids = {data['author'] for _, data in valid}
+        known = set(Author.objects.filter(pk__in=author_ids).values_list('pk', flat=True))
+        books, lines = [], []
+        for line, data in valid:
+            if data['author'] not in known:
+                report.error(line, {'author': [f'Invalid pk "{data["author"]}" - object does not exist.']})
+                continue
+            books.append(Book(title=data['title'], publication_year=data['publication_year'],
+                              author_id=data['author']))
+            lines.append(line)
+
+        try:
+            with transaction.atomic():
+                Book.objects.bulk_create(books)
+                BookChange.record(BookChange.INSERT, [book.pk for book in books])
+        except DatabaseError as exc:
+            for line in lines:
+                report.error(line, {'non_field_errors': [f'Chunk could not be saved: {exc}']})
+        else:
+            report.created += len(books)
+            # bulk_create sends no post_save, so invalidate cached responses
+            # here (the change log entries were written above), once any
+            # enclosing transaction has committed too.
+            if books:
+                transaction.on_commit(bump_version)
+    return report
+
+
+class Echo:
+    """File-like object whose write() returns what it was given, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in queryset.values_list('id', 'title', 'publication_year', 'author_id').iterator(chunk_size=2000):
+        yield writer.writerow(row)
+
+
+def export_ndjson(queryset):
+    for row in queryset.values_list('id', 'title', 'publication_year', 'author_id').iterator(chunk_size=2000):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), separators=(',', ':')) + '\n'
+
+
+WRITERS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
@@ -0,0 +1,129 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+
+# ------------------------------------------------
+# Response cache for the read endpoints
+# Entries are keyed by the view, a catalogue version, the audience (anonymous
+# or authenticated) and the query params in normalised form. Any Book/Author
+# write bumps the version (see api.signals), which orphans every entry at once.
+# Past its fresh period an entry is served stale while a single request,
+# holding a short lock, recomputes it.
+# ------------------------------------------------
+VERSION_KEY = 'api:catalogue:version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def get_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Lost (evicted or never set): restart at the current time, not 1,
+        # since responses cached under low versions may not have expired.
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+class CachedResponseMixin:
+    """
+    Caches the serialised data of successful GET responses (rendering still
+    follows content negotiation). Adds an ``X-Cache: HIT|STALE|MISS`` header.
+    """
+    cache_timeout = 60          # seconds an entry is fresh
+    cache_stale_timeout = 300   # further seconds it may be served stale
+    cache_lock_timeout = 10
+    # Params whose order within a comma-separated value doesn't matter
+    unordered_list_params = ('fields', 'expand')
+
+    def get_cache_params(self):
+        """Query params that can change the response; anything else is ignored."""
+        names = {'fields', 'expand'}
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is not None:
+            names.update(filterset_class.base_filters)
+        for backend in self.filter_backends:
+            for attr in ('search_param', 'ordering_param'):
+                if hasattr(backend, attr):
+                    names.add(getattr(backend, attr))
+        paginator = self.paginator
+        if paginator is not None:
+            for attr in ('cursor_query_param', 'page_size_query_param', 'count_query_param', 'page_query_param'):
+                if getattr(paginator, attr, None):
+                    names.add(getattr(paginator, attr))
+        return names
+
+    def get_cache_param_defaults(self):
+        """Param values that mean the same as leaving the param out."""
+        defaults = {'count': ('0', 'false')}
+        if getattr(self, 'ordering', None):
+            defaults['ordering'] = (','.join(self.ordering),)
+        if getattr(self, 'default_expand', None) is not None:
+            defaults['expand'] = (self.default_expand,)
+        return defaults
+
+    def normalized_params(self):
+        params = self.request.query_params
+        defaults = self.get_cache_param_defaults()
+        normalized = []
+        for name in sorted(self.get_cache_params()):
+            values = [value.strip() for value in params.getlist(name)]
+            if name in self.unordered_list_params:
+                values = [','.join(sorted({part.strip() for v in values for part in v.split(',')} - {''}))]
+            values = [value for value in values if value]
+            if not values or (len(values) == 1 and values[0] in defaults.get(name, ())):
+                continue
+            normalized.append(f'{name}={"&".join(values)}')
+        return '&'.join(normalized)
+
+    def get_cache_audience(self):
+        return 'auth' if self.request.user and self.request.user.is_authenticated else 'anon'
+
+    def get_cache_key(self, *args, **kwargs):
+        parts = [
+            self.request.get_host(),
+            ','.join(f'{k}={v}' for k, v in sorted(kwargs.items())),
+            self.normalized_params(),
+        ]
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return f'api:response:{type(self).__name__}:{get_version()}:{self.get_cache_audience()}:{digest}'
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(*args, **kwargs)
+        lock_key = f'{key}:lock'
+        entry = cache.get(key)
+        locked = False
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                return Response(entry['data'], headers={'X-Cache': 'HIT'})
+            # Stale: everyone but the lock holder keeps getting the old data.
+            locked = cache.add(lock_key, 1, timeout=self.cache_lock_timeout)
+            if not locked:
+                return Response(entry['data'], headers={'X-Cache': 'STALE'})
+
+        try:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == 200:
+                entry = {'data': response.data, 'fresh_until': time.time() + self.cache_timeout}
+                cache.set(key, entry, self.cache_timeout + self.cache_stale_timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        response['X-Cache'] = 'MISS'
+        return response
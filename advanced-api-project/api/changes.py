@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Max
+
+from .models import BookChange
+
+# Set while a bulk write records its own changes in one INSERT, so the
+# per-row signal receivers stay out of the way.
+_recording_in_bulk = ContextVar('book_changes_in_bulk', default=False)
+
+
+@contextmanager
+def recorded_in_bulk():
+    token = _recording_in_bulk.set(True)
+    try:
+        yield
+    finally:
+        _recording_in_bulk.reset(token)
+
+
+def is_recording_in_bulk():
+    return _recording_in_bulk.get()
+
+
+def head_cursor():
+    return BookChange.objects.aggregate(head=Max('pk'))['head'] or 0
+
+
+def changes_since(since, limit):
+    """
+    Book ids inserted, updated and deleted after cursor ``since``, from at
+    most ``limit`` log entries, collapsed per book: a book inserted and then
+    deleted within the window doesn't appear at all.
+
+    Cursors are BookChange ids. They are handed out in commit order as long
+    as writers are serialised (SQLite); on a database with concurrent
+    writers, a reader could skip a change whose transaction commits after
+    a later id is read.
+    """
+    rows = list(
+        BookChange.objects.filter(pk__gt=since).order_by('pk')
+        .values_list('pk', 'book_id', 'kind')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    state = {}
+    for _, book_id, kind in rows:
+        inserted, _ = state.get(book_id, (False, None))
+        state[book_id] = (inserted or kind == BookChange.INSERT, kind)
+
+    inserted, updated, deleted = [], [], []
+    for book_id, (was_inserted, last_kind) in state.items():
+        if last_kind == BookChange.DELETE:
+            if not was_inserted:
+                deleted.append(book_id)
+        elif was_inserted:
+            inserted.append(book_id)
+        else:
+            updated.append(book_id)
+    return {
+        'cursor': str(rows[-1][0] if rows else since),
+        'has_more': has_more,
+        'inserted': inserted,
+        'updated': updated,
+        'deleted': deleted,
+    }
@@ -0,0 +1,31 @@
+from django.db.models.functions import Lower
+from django_filters import rest_framework as filters
+
+from .models import Book
+
+
+# ------------------------------------------------
+# Book list filters
+# Same fields as before (title, author, publication_year) plus a
+# case-insensitive title prefix match that can use the LOWER(title) index.
+# ------------------------------------------------
+class BookFilter(filters.FilterSet):
+    title_prefix = filters.CharFilter(method='filter_title_prefix')
+
+    class Meta:
+        model = Book
+        fields = ['title', 'author', 'publication_year']
+
+    def filter_title_prefix(self, queryset, name, value):
+        if not value:
+            return queryset
+        # SQLite's LOWER() only folds ASCII, so for anything else Python's
+        # lower() need not match the indexed values (and U+10FFFF has no
+        # successor to bound the range): those prefixes keep istartswith.
+        if not value.isascii():
+            return queryset.filter(title__istartswith=value)
+        prefix = value.lower()
+        # A range on the indexed expression: SQLite never uses an index for
+        # LIKE on an expression, and istartswith would compile to LIKE.
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return queryset.alias(title_lower=Lower('title')).filter(title_lower__gte=prefix, title_lower__lt=upper)
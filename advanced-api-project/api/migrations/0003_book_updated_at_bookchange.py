@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('insert', 'Insert'), ('update', 'Update'), ('delete', 'Delete')], max_length=6)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        # Existing books count as inserted, so a sync from cursor 0 sees them.
+        migrations.RunSQL(
+            "INSERT INTO api_bookchange (book_id, kind, changed_at) "
+            "SELECT id, 'insert', CURRENT_TIMESTAMP FROM api_book ORDER BY id",
+            migrations.RunSQL.noop,
+        ),
+    ]
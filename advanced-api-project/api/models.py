@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 # Create your models here.
 class Author(models.Model):
@@ -11,6 +12,39 @@ class Book(models.Model):
     title = models.CharField(max_length=200)
     publication_year = models.IntegerField()
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination over the default ordering seeks on (title, id)
+            models.Index(fields=['title', 'id'], name='api_book_title_id_idx'),
+            # ?publication_year=...&ordering=title
+            models.Index(fields=['publication_year', 'title'], name='api_book_year_title_idx'),
+            # ?author=...&ordering=publication_year, and the authors' nested books
+            models.Index(fields=['author', 'publication_year'], name='api_book_author_year_idx'),
+            # Case-insensitive ?title_prefix= (see api.filters.BookFilter)
+            models.Index(Lower('title'), name='api_book_title_lower_idx'),
+        ]
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+
+class BookChange(models.Model):
+    """
+    Append-only log of Book writes for delta sync (see api.changes). The
+    auto-increment id is the sync cursor; rows for deleted books are the
+    tombstones.
+    """
+    INSERT = 'insert'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    KIND_CHOICES = [(INSERT, 'Insert'), (UPDATE, 'Update'), (DELETE, 'Delete')]
+
+    book_id = models.BigIntegerField()  # not a FK: tombstones outlive the book
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def record(cls, kind, book_ids):
+        cls.objects.bulk_create([cls(book_id=pk, kind=kind) for pk in book_ids])
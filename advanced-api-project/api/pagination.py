@@ -0,0 +1,122 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# ------------------------------------------------
+# Keyset (cursor) pagination
+# Pages are fetched with a range query on (<ordering>, pk) instead of OFFSET,
+# so deep pages are as cheap as the first and stay stable under inserts.
+# ------------------------------------------------
+class KeysetPagination(BasePagination):
+    """
+    Opt-in: the plain list response is returned unless the client sends
+    ``?cursor=`` (empty for the first page) or ``?page_size=``. The total
+    count is only computed when ``?count=true`` is passed.
+
+    The ordering comes from the view (``OrderingFilter``/``ordering``) with
+    ``pk`` appended as a tie-breaker, and is baked into the cursor so a cursor
+    cannot be replayed against a different ordering.
+    """
+    page_size = 20
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    # False: paginate every response, even without ?cursor=/?page_size=.
+    opt_in = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.opt_in and self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = queryset.count() if params.get(self.count_query_param) in ('1', 'true') else None
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(cursor)
+            try:
+                queryset = queryset.filter(self.keyset_filter(values))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # One extra row tells us whether there is a next page without a COUNT.
+        rows = list(queryset[:self.page_size + 1])
+        self.next_values = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_values = [self.field_value(rows[-1], field) for field in self.ordering]
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset):
+        ordering = [field for field in queryset.query.order_by if field.lstrip('-') not in ('pk', 'id')]
+        if not ordering:
+            ordering = list(queryset.model._meta.ordering)
+        descending = bool(ordering) and ordering[-1].startswith('-')
+        return tuple(ordering) + ('-pk' if descending else 'pk',)
+
+    def field_value(self, obj, field):
+        name = field.lstrip('-')
+        if name == 'pk':
+            return obj.pk
+        return getattr(obj, obj._meta.get_field(name).attname)
+
+    def keyset_filter(self, values):
+        clauses = []
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {self.ordering[j].lstrip('-'): values[j] for j in range(i)}
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+        return reduce(or_, clauses)
+
+    def encode_cursor(self, values):
+        data = json.dumps({'o': self.ordering, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            ordering, values = tuple(data['o']), data['v']
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([('next', self.get_next_link())])
+        if self.count is not None:
+            body['count'] = self.count
+        body['results'] = data
+        return Response(body)
@@ -0,0 +1,92 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+# ------------------------------------------------
+# Sparse fieldsets: ?fields=id,title&expand=author
+# Dotted names reach into nested serializers (?fields=name,books.title).
+# The serializer drops what wasn't asked for (SparseFieldsMixin) and the
+# queryset is cut down to match: .only() the columns that are rendered,
+# and prefetch a relation only when a nested field actually renders it.
+# ------------------------------------------------
+def parse_tree(value):
+    """``'id,books.title,books.id'`` -> ``{'id': {}, 'books': {'title': {}, 'id': {}}}``."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def project(queryset, serializer, required=(), refine=None):
+    """
+    Restrict ``queryset`` to the model fields ``serializer`` renders (plus
+    ``required``) and prefetch the relations its nested serializers render,
+    recursively. Returned unchanged if a field's source isn't a model field.
+
+    ``refine(name, related_queryset)`` may order or slice the queryset
+    prefetched for each top-level relation.
+    """
+    refine = refine or (lambda name, related: related)
+    model = queryset.model
+    only, prefetches = {model._meta.pk.name, *required}, []
+    for field in serializer.fields.values():
+        if field.source == '*' or '.' in field.source:
+            return queryset
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return queryset
+
+        nested = getattr(field, 'child', field)
+        if not model_field.is_relation:
+            only.add(model_field.name)
+        elif model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+            only.add(model_field.name)
+            if isinstance(nested, serializers.BaseSerializer):
+                related = project(model_field.related_model._default_manager.all(), nested)
+                prefetches.append(Prefetch(model_field.name, queryset=refine(model_field.name, related)))
+        elif model_field.one_to_many:
+            # The reverse FK is needed to attach each row to its parent.
+            related = model_field.related_model._default_manager.all()
+            reverse_fk = [model_field.field.name]
+            if isinstance(nested, serializers.BaseSerializer):
+                related = project(related, nested, required=reverse_fk)
+            else:
+                related = related.only(*reverse_fk)
+            name = model_field.get_accessor_name()
+            prefetches.append(Prefetch(name, queryset=refine(name, related)))
+        else:
+            return queryset
+    return queryset.only(*only).prefetch_related(*prefetches)
+
+
+class FieldProjectionMixin:
+    """
+    View mixin for ``?fields=`` and ``?expand=`` (see SparseFieldsMixin).
+    Without ``?expand=`` the view's ``default_expand`` applies.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    default_expand = ''
+
+    def get_field_trees(self):
+        params = self.request.query_params
+        fields = parse_tree(params.get(self.fields_query_param, '')) or None
+        expand = parse_tree(params.get(self.expand_query_param, self.default_expand))
+        return fields, expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self.get_field_trees()
+        return context
+
+    def get_related_queryset(self, name, queryset):
+        """Hook to order or slice the prefetch for relation ``name``."""
+        return queryset
+
+    def get_queryset(self):
+        return project(super().get_queryset(), self.get_serializer(), refine=self.get_related_queryset)
@@ -1,11 +1,116 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 from rest_framework import serializers
 from .models import Book, Author
 import datetime
 
-class BookSerializer(serializers.ModelSerializer): #serializer for Book model
+
+class SparseFieldsMixin: #sparse fieldsets, see api.projection
+    """
+    Drops the fields a client did not ask for and nests the ones it asked to
+    expand. The root serializer reads the ``fields`` / ``expand`` trees from
+    its context; nested serializers get their subtree from their parent.
+
+    ``expandable_fields`` maps a field name to a callable returning the
+    nested serializer that replaces the plain field when it is expanded.
+    When a serializer is such an expansion, its ``expansion_omit_fields``
+    are left out unless the client names them in ``fields`` or ``expand``.
+    """
+    expandable_fields = {}
+    expansion_omit_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = getattr(self, 'sparse_fields', self.context.get('fields'))
+        expand = getattr(self, 'sparse_expand', self.context.get('expand')) or {}
+
+        expanded = set()
+        for name, make_field in self.expandable_fields.items():
+            if name in expand and name in fields:
+                fields[name] = make_field()
+                expanded.add(name)
+        if getattr(self, 'sparse_expansion', False):
+            omit = set(self.expansion_omit_fields) - set(wanted or ()) - set(expand)
+            fields = {name: field for name, field in fields.items() if name not in omit}
+        if wanted:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+
+        for name, field in fields.items():
+            nested = getattr(field, 'child', field)
+            if isinstance(nested, SparseFieldsMixin):
+                nested.sparse_fields = (wanted or {}).get(name) or None
+                nested.sparse_expand = expand.get(name) or {}
+                nested.sparse_expansion = name in expanded
+        return fields
+
+
+class FastListSerializer(serializers.ListSerializer): #read-only fast path for lists
+    """
+    When the context has ``fast_serialization`` set, this is the root
+    serializer (nested lists share the context but get related managers)
+    and every field of the child is a plain column, rows are built straight from ``values_list()``
+    tuples (or model attributes for an already-evaluated page) instead of
+    going through each field's ``to_representation``. The output is the same
+    as the regular path; anything else falls back to it.
+    """
+    converters = {
+        serializers.IntegerField: int,
+        serializers.CharField: str,
+        serializers.PrimaryKeyRelatedField: None,
+    }
+    if hasattr(serializers, 'BigIntegerField'):  # DRF >= 3.16
+        converters[serializers.BigIntegerField] = int
+
+    def get_converter(self, field):
+        converter = self.converters[type(field)]
+        if getattr(field, 'coerce_to_string', False):
+            return str
+        return converter
+
+    def get_columns(self):
+        opts = self.child.Meta.model._meta
+        columns = []
+        for name, field in self.child.fields.items():
+            if field.write_only:
+                continue
+            if type(field) not in self.converters or '.' in field.source or field.source == '*':
+                return None
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if model_field.is_relation and not model_field.many_to_one:
+                return None
+            columns.append((name, model_field.attname, self.get_converter(field)))
+        return columns
+
+    def to_representation(self, data):
+        fast = self.parent is None and self.context.get('fast_serialization')
+        columns = self.get_columns() if fast else None
+        if columns is None:
+            return super().to_representation(data)
+        names = [name for name, _, _ in columns]
+        if isinstance(data, models.QuerySet):
+            rows = data.values_list(*[attname for _, attname, _ in columns])
+        else:
+            rows = ([getattr(obj, attname) for _, attname, _ in columns] for obj in data)
+        converters = [convert for _, _, convert in columns]
+        return [
+            dict(zip(names, [value if value is None or convert is None else convert(value)
+                             for convert, value in zip(converters, row)]))
+            for row in rows
+        ]
+
+
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer): #serializer for Book model
+    expandable_fields = {
+        'author': lambda: AuthorSerializer(read_only=True),
+    }
+
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
+        list_serializer_class = FastListSerializer
         
     #custom validation to ensure publication year is not in the future
     def validate_publication_year(self, value):
@@ -13,9 +118,21 @@ class BookSerializer(serializers.ModelSerializer): #serializer for Book model
         if value > current_year:
             raise serializers.ValidationError(f"Publication year cannot be in the future. {{value}} > {{current_year}}")
         return value    
+
+
+class BookImportSerializer(BookSerializer): #one row of a bulk import (api.bulk)
+    # A plain integer: authors are looked up once per chunk, not per row.
+    # Capped at the largest primary key, or the lookup overflows.
+    author = serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1)
+
+    class Meta(BookSerializer.Meta):
+        fields = ['title', 'publication_year', 'author']
+
         
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     books = BookSerializer(many=True, read_only=True)
+    # ?expand=author on books: every book by the author only on request
+    expansion_omit_fields = ('books',)
 
     class Meta:
         model = Author
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .changes import is_recording_in_bulk
+from .models import Author, Book, BookChange
+
+
+# Any catalogue write orphans the cached responses (api.cache). Bulk writes
+# that bypass signals (api.bulk) bump the version themselves. The bump waits
+# for the commit: bumped earlier, a concurrent request could still read the
+# old rows and cache them under the new version.
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_responses(sender, **kwargs):
+    transaction.on_commit(bump_version)
+
+
+# Delta sync log (api.changes). Bulk writes record their own changes.
+@receiver(post_save, sender=Book)
+def record_book_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw and not is_recording_in_bulk():
+        BookChange.record(BookChange.INSERT if created else BookChange.UPDATE, [instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def record_book_deleted(sender, instance, **kwargs):
+    if not is_recording_in_bulk():
+        BookChange.record(BookChange.DELETE, [instance.pk])
@@ -1,12 +1,22 @@
+import json
+import time
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from .models import Author, Book
+from .views import AuthorDetailView
 
 
 class BookAPITestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         # Create a user for authentication
         self.user = User.objects.create_user(username='testuser', password='password123')
         self.admin_user = User.objects.create_superuser(username='admin', password='admin123')
@@ -128,4 +138,536 @@ class BookAPITestCase(APITestCase):
         url = reverse('book_list') + '?ordering=-publication_year'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data[0]['publication_year'], 1997)
\ No newline at end of file
+        self.assertEqual(response.data[0]['publication_year'], 1997)
+
+class BookKeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Author')
+        for i in range(7):
+            Book.objects.create(title=f'Book {i % 3}', publication_year=1990 + i, author=self.author)
+        self.url = reverse('book-list')
+
+    def collect(self, **params):
+        ids, url, pages = [], self.url, 0
+        params.setdefault('cursor', '')
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(book['id'] for book in response.data['results'])
+            pages += 1
+            if not response.data['next']:
+                return ids, pages
+            response = self.client.get(response.data['next'])
+
+    def test_unpaginated_without_cursor(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), 7)
+
+    def test_walks_default_ordering_with_ties(self):
+        ids, pages = self.collect(page_size=3)
+        expected = list(Book.objects.order_by('title', 'pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_respects_requested_ordering(self):
+        ids, _ = self.collect(page_size=2, ordering='-publication_year')
+        expected = list(Book.objects.order_by('-publication_year', '-pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_count_is_optional(self):
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 2})
+        self.assertNotIn('count', response.data)
+        response = self.client.get(self.url, {'cursor': '', 'page_size': 2, 'count': 'true'})
+        self.assertEqual(response.data['count'], 7)
+
+    def test_stable_under_concurrent_inserts(self):
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 3})
+        Book.objects.create(title='A new book', publication_year=2000, author=self.author)
+        second = self.client.get(first.data['next'])
+        first_ids = {book['id'] for book in first.data['results']}
+        self.assertFalse(first_ids & {book['id'] for book in second.data['results']})
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BookBulkImportExportTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='password123')
+        self.author = Author.objects.create(name='Ursula K. Le Guin')
+        self.client.force_authenticate(self.user)
+
+    def post(self, fmt, body, **params):
+        url = reverse('book-import', kwargs={'fmt': fmt})
+        if params:
+            url += '?' + '&'.join(f'{k}={v}' for k, v in params.items())
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        return self.client.post(url, body.encode(), content_type=content_type)
+
+    def test_ndjson_import_reports_bad_rows(self):
+        body = '\n'.join([
+            f'{{"title": "A Wizard of Earthsea", "publication_year": 1968, "author": {self.author.pk}}}',
+            '{"title": "Broken", ',
+            f'{{"title": "From the future", "publication_year": 3000, "author": {self.author.pk}}}',
+            '{"title": "Nobody wrote this", "publication_year": 1990, "author": 9999}',
+            '',
+            f'{{"title": "The Dispossessed", "publication_year": 1974, "author": {self.author.pk}}}',
+        ])
+        response = self.post('ndjson', body, chunk_size=2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 3)
+        self.assertEqual([e['line'] for e in response.data['errors']], [2, 3, 4])
+        self.assertIn('publication_year', response.data['errors'][1]['errors'])
+        self.assertIn('author', response.data['errors'][2]['errors'])
+        self.assertEqual(
+            sorted(Book.objects.values_list('title', flat=True)),
+            ['A Wizard of Earthsea', 'The Dispossessed'],
+        )
+
+    def test_out_of_range_author_is_a_row_error(self):
+        body = '\n'.join([
+            f'{{"title": "Earlier chunk", "publication_year": 1968, "author": {self.author.pk}}}',
+            f'{{"title": "Overflow", "publication_year": 1968, "author": {10 ** 23}}}',
+            f'{{"title": "Same chunk", "publication_year": 1971, "author": {self.author.pk}}}',
+        ])
+        response = self.post('ndjson', body, chunk_size=1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 1))
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+        self.assertIn('author', response.data['errors'][0]['errors'])
+
+    def test_csv_import_resolves_authors_once_per_chunk(self):
+        rows = ''.join(f'Book {i},{1900 + i},{self.author.pk}\n' for i in range(10))
+        # Per chunk: author lookup, savepoint, INSERT, change-log INSERT, release.
+        with self.assertNumQueries(5):
+            response = self.post('csv', 'title,publication_year,author\n' + rows)
+        self.assertEqual(response.data['created'], 10)
+        self.assertEqual(response.data['errors'], [])
+
+    def test_csv_bad_rows_do_not_end_the_import(self):
+        pk = self.author.pk
+        body = b''.join([
+            b'title,publication_year,author\n',
+            f'The Lathe of Heaven,1971,{pk}\n'.encode(),
+            b'Bad \xff byte,1972,1\n',
+            f'From the future,3000,{pk}\n'.encode(),
+            f'The Word for World Is Forest,1972,{pk}\n'.encode(),
+            b'\xff',
+        ])
+        url = reverse('book-import', kwargs={'fmt': 'csv'})
+        response = self.client.post(url, body, content_type='text/csv')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['line'] for e in response.data['errors']], [3, 4, 6])
+        self.assertEqual(
+            sorted(Book.objects.values_list('title', flat=True)),
+            ['The Lathe of Heaven', 'The Word for World Is Forest'],
+        )
+
+    def test_import_requires_authentication_and_known_format(self):
+        self.assertEqual(self.post('xml', '<books/>').status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(None)
+        self.assertIn(self.post('csv', 'title\n').status_code,
+                      (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_export_streams_filtered_rows(self):
+        other = Author.objects.create(name='Someone Else')
+        lavinia = Book.objects.create(title='Lavinia', publication_year=2008, author=self.author)
+        Book.objects.create(title='Other', publication_year=2000, author=other)
+        response = self.client.get(reverse('book-export', kwargs={'fmt': 'csv'}), {'author': self.author.pk})
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines(), ['id,title,publication_year,author', f'{lavinia.pk},Lavinia,2008,{self.author.pk}'])
+
+        response = self.client.get(reverse('book-export', kwargs={'fmt': 'ndjson'}))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Lavinia', 'Other'])
+
+
+class SparseFieldsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Octavia E. Butler')
+        self.book = Book.objects.create(title='Kindred', publication_year=1979, author=self.author)
+        self.dawn = Book.objects.create(title='Dawn', publication_year=1987, author=self.author)
+
+    def test_default_output_is_unchanged(self):
+        response = self.client.get(reverse('book-detail', kwargs={'pk': self.book.pk}))
+        self.assertEqual(response.data, {
+            'id': self.book.pk, 'title': 'Kindred', 'publication_year': 1979, 'author': self.author.pk,
+        })
+
+    def test_fields_reach_the_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('book-list'), {'fields': 'id,title'})
+        self.assertEqual(response.data, [{'id': self.dawn.pk, 'title': 'Dawn'}, {'id': self.book.pk, 'title': 'Kindred'}])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('publication_year', ctx.captured_queries[0]['sql'])
+
+    def test_expand_author_prefetches_only_requested_fields(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('book-list'), {'fields': 'title,author.name', 'expand': 'author'})
+        self.assertEqual(response.data[0], {'title': 'Dawn', 'author': {'name': 'Octavia E. Butler'}})
+
+    def test_expanded_author_leaves_out_books_unless_asked(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('book-list'), {'expand': 'author'})
+        self.assertEqual(response.data[0]['author'], {'id': self.author.pk, 'name': 'Octavia E. Butler'})
+
+        for params in ({'expand': 'author.books'}, {'expand': 'author', 'fields': 'title,author.books'}):
+            with self.assertNumQueries(3):
+                response = self.client.get(reverse('book-list'), params)
+            books = response.data[0]['author']['books']
+            self.assertEqual(sorted(book['title'] for book in books), ['Dawn', 'Kindred'])
+
+        # Listed on its own, an author still has its books
+        response = self.client.get(reverse('author-detail', kwargs={'pk': self.author.pk}))
+        self.assertEqual(len(response.data['books']), 2)
+
+    def test_nested_books_are_only_prefetched_when_rendered(self):
+        from .serializers import AuthorSerializer
+        from .projection import project
+        queryset = Author.objects.all()
+        serializer = AuthorSerializer(context={'fields': {'id': {}, 'name': {}}})
+        self.assertEqual(project(queryset, serializer)._prefetch_related_lookups, ())
+        serializer = AuthorSerializer(context={'fields': {'name': {}, 'books': {'title': {}}}})
+        with self.assertNumQueries(2):
+            data = AuthorSerializer(project(queryset, serializer), many=True,
+                                    context={'fields': {'name': {}, 'books': {'title': {}}}}).data
+        self.assertEqual(data[0]['books'], [{'title': 'Kindred'}, {'title': 'Dawn'}])
+
+
+class AuthorAPITestCase(APITestCase):
+    def add_authors(self, count, books=3):
+        for i in range(count):
+            author = Author.objects.create(name=f'Author {Author.objects.count():03}')
+            for year in range(books):
+                Book.objects.create(title=f'Book {year}', publication_year=2000 - year, author=author)
+
+    def test_query_count_is_constant(self):
+        self.add_authors(2)
+        # Page of authors + one prefetch for all their books.
+        with self.assertNumQueries(2):
+            self.client.get(reverse('author-list'))
+        self.add_authors(15, books=5)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('author-list'))
+        self.assertEqual(len(response.data['results']), 17)
+
+    def test_books_are_ordered_and_capped(self):
+        self.add_authors(1, books=30)
+        author = Author.objects.get()
+        response = self.client.get(reverse('author-detail', kwargs={'pk': author.pk}))
+        years = [book['publication_year'] for book in response.data['books']]
+        self.assertEqual(len(years), AuthorDetailView.books_per_author)
+        self.assertEqual(years, sorted(years))
+        self.assertEqual(years[0], 1971)
+
+    def test_paginated_by_name(self):
+        self.add_authors(5, books=0)
+        response = self.client.get(reverse('author-list'), {'page_size': 2})
+        self.assertEqual([a['name'] for a in response.data['results']], ['Author 000', 'Author 001'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([a['name'] for a in response.data['results']], ['Author 002', 'Author 003'])
+
+    def test_fields_skip_the_books_prefetch(self):
+        self.add_authors(3)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('author-list'), {'fields': 'id,name'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+
+class FastSerializationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        author = Author.objects.create(name='N. K. Jemisin')
+        for i in range(5):
+            Book.objects.create(title=f'Broken Earth {i}', publication_year=2015 + i, author=author)
+
+    def render(self, data, fast, **context):
+        from rest_framework.renderers import JSONRenderer
+        from .serializers import BookSerializer
+        serializer = BookSerializer(data, many=True, context={'fast_serialization': fast, **context})
+        return JSONRenderer().render(serializer.data)
+
+    def test_output_is_byte_identical(self):
+        queryset = Book.objects.order_by('title')
+        for data in (queryset, list(queryset)):
+            self.assertEqual(self.render(data, True), self.render(data, False))
+        fields = {'title': {}, 'author': {}}
+        self.assertEqual(self.render(queryset, True, fields=fields), self.render(queryset, False, fields=fields))
+
+    def test_list_view_skips_per_row_serialization(self):
+        from unittest import mock
+        from .serializers import BookSerializer
+        with mock.patch.object(BookSerializer, 'to_representation', side_effect=AssertionError), \
+                CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('book-list'))
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_nested_fields_fall_back(self):
+        response = self.client.get(reverse('book-list'), {'expand': 'author', 'fields': 'title,author.name'})
+        self.assertEqual(response.data[0]['author'], {'name': 'N. K. Jemisin'})
+
+    def test_plain_expand_falls_back(self):
+        # The expanded author's nested books list shares the root context
+        response = self.client.get(reverse('book-list'), {'expand': 'author.books'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0]['author']['name'], 'N. K. Jemisin')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite-specific')
+class BookIndexQueryPlanTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        authors = Author.objects.bulk_create(Author(name=f'Author {i}') for i in range(20))
+        Book.objects.bulk_create(
+            Book(title=f'Title {i}', publication_year=1900 + i % 100, author=authors[i % 20])
+            for i in range(500)
+        )
+
+    def plan(self, params):
+        from rest_framework.test import APIRequestFactory
+        from rest_framework.request import Request
+        from .views import BookListView
+        view = BookListView()
+        view.request = Request(APIRequestFactory().get('/books/', params))
+        view.format_kwarg = None
+        return view.filter_queryset(view.get_queryset()).explain()
+
+    def test_year_filter_ordered_by_title(self):
+        self.assertIn('api_book_year_title_idx', self.plan({'publication_year': 1950, 'ordering': 'title'}))
+
+    def test_author_filter_ordered_by_year(self):
+        author = Author.objects.first()
+        self.assertIn('api_book_author_year_idx', self.plan({'author': author.pk, 'ordering': 'publication_year'}))
+
+    def test_title_prefix_uses_lower_index(self):
+        self.assertIn('api_book_title_lower_idx', self.plan({'title_prefix': 'TITLE 4'}))
+        response = self.client.get(reverse('book-list'), {'title_prefix': 'tItLe 49'})
+        self.assertEqual(len(response.data), 11)
+
+    def test_non_ascii_title_prefix_falls_back(self):
+        Book.objects.create(title='Émile', publication_year=1762, author=Author.objects.first())
+        response = self.client.get(reverse('book-list'), {'title_prefix': 'Émi'})
+        self.assertEqual([book['title'] for book in response.data], ['Émile'])
+        response = self.client.get(reverse('book-list'), {'title_prefix': 'x\U0010ffff'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_default_ordering(self):
+        self.assertIn('api_book_title_id_idx', self.plan({}))
+
+
+class ResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='password123')
+        self.author = Author.objects.create(name='Ted Chiang')
+        self.book = Book.objects.create(title='Exhalation', publication_year=2019, author=self.author)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_equivalent_params_share_an_entry(self):
+        url = reverse('book-list')
+        self.assertEqual(self.get(url, {'search': 'exh', 'fields': 'title,id'})['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.get(url + '?fields=id,title&ordering=title&search=exh&count=false&utm=x')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data, [{'id': self.book.pk, 'title': 'Exhalation'}])
+        self.assertEqual(self.get(url, {'search': 'exh', 'ordering': '-title'})['X-Cache'], 'MISS')
+
+    def test_writes_invalidate(self):
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        self.get(url)
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'Stories of Your Life'
+            self.book.save()
+            # Uncommitted: the cached response stays valid until the commit
+            self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        response = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data['title']), ('MISS', 'Stories of Your Life'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+
+    def test_bulk_import_invalidates(self):
+        url = reverse('book-list')
+        self.get(url)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('book-import', kwargs={'fmt': 'csv'}),
+                             f'title,publication_year,author\nArrival,2016,{self.author.pk}\n'.encode(),
+                             content_type='text/csv')
+        self.client.force_authenticate(None)
+        self.assertEqual(len(self.get(url).data), 2)
+
+    def test_audiences_are_cached_separately(self):
+        url = reverse('book-list')
+        self.get(url)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+    def test_stale_while_revalidate(self):
+        from unittest import mock
+        from .cache import get_cache
+        url = reverse('book-list')
+        self.get(url)
+        with mock.patch('api.cache.time.time', return_value=time.time() + 120):
+            # While another request holds the refresh lock, the stale entry is served.
+            with mock.patch.object(get_cache(), 'add', return_value=False):
+                self.assertEqual(self.get(url)['X-Cache'], 'STALE')
+            # Otherwise the request takes the lock and recomputes.
+            self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+            self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+
+class BookChangesTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='editor', password='password123')
+        self.author = Author.objects.create(name='Becky Chambers')
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(reverse('book-changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_changes_collapse_per_book(self):
+        edited = Book.objects.create(title='Record of a Spaceborn Few', publication_year=2018, author=self.author)
+        removed = Book.objects.create(title='A Closed and Common Orbit', publication_year=2016, author=self.author)
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.sync(cursor)['updated'], [])
+
+        self.client.force_authenticate(self.user)
+        self.client.patch(reverse('book-update', kwargs={'pk': edited.pk}), {'publication_year': 2019})
+        removed_id = removed.pk
+        removed.delete()
+        added = Book.objects.create(title='The Galaxy, and the Ground Within', publication_year=2021, author=self.author)
+        Book.objects.create(title='Draft', publication_year=2021, author=self.author).delete()
+
+        changes = self.sync(cursor)
+        self.assertEqual((changes['inserted'], changes['updated'], changes['deleted']),
+                         ([added.pk], [edited.pk], [removed_id]))
+        self.assertEqual(self.sync(changes['cursor'])['inserted'], [])
+
+    def test_import_and_cascade_are_logged(self):
+        cursor = self.sync()['cursor']
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('book-import', kwargs={'fmt': 'csv'}),
+                         f'title,publication_year,author\nA,2014,{self.author.pk}\nB,2015,{self.author.pk}\n'.encode(),
+                         content_type='text/csv')
+        imported = self.sync(cursor)
+        ids = list(Book.objects.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(imported['inserted'], ids)
+
+        self.author.delete()
+        self.assertEqual(sorted(self.sync(imported['cursor'])['deleted']), ids)
+
+    def test_pages_with_has_more(self):
+        cursor = self.sync()['cursor']
+        books = [Book.objects.create(title=f'Book {i}', publication_year=2000, author=self.author) for i in range(5)]
+        seen = []
+        while True:
+            changes = self.sync(cursor, limit=2)
+            seen += changes['inserted']
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                break
+        self.assertEqual(seen, [book.pk for book in books])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('book-changes'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_limit_is_reported_as_limit(self):
+        response = self.client.get(reverse('book-changes'), {'since': '0', 'limit': 'ten'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data), ['limit'])
+
+
+class TokenBucketThrottleTestCase(APITestCase):
+    def setUp(self):
+        from .throttling import local_store, metrics
+        local_store.clear()
+        metrics.reset()
+        self.user = User.objects.create_user(username='scraper', password='password123')
+        author = Author.objects.create(name='Iain M. Banks')
+        Book.objects.create(title='Excession', publication_year=1996, author=author)
+
+    def rates(self, anon='10/min', user='20/min', **extra):
+        return override_settings(REST_FRAMEWORK={
+            'DEFAULT_THROTTLE_RATES': {'anon': anon, 'user': user}}, **extra)
+
+    def statuses(self, count, params=None):
+        url = reverse('book-list')
+        return [self.client.get(url, params or {}).status_code for _ in range(count)]
+
+    def test_bucket_empties_then_rejects_with_retry_after(self):
+        with self.rates():
+            self.assertEqual(self.statuses(11), [200] * 10 + [429])
+            response = self.client.get(reverse('book-list'))
+        self.assertEqual(int(response['Retry-After']), 6)
+
+        from .throttling import metrics
+        self.assertEqual(metrics.snapshot(), {'anon': {'allowed': 10, 'throttled': 2}})
+
+    def test_search_costs_more(self):
+        with self.rates():
+            self.assertEqual(self.statuses(1, {'search': 'exc'}), [200])
+            # A blank search is a plain list: 5 tokens left, one each.
+            self.assertEqual(self.statuses(6, {'search': ' '}), [200] * 5 + [429])
+
+    def test_users_have_their_own_buckets(self):
+        with self.rates(anon='1/min'):
+            self.assertEqual(self.statuses(2), [200, 429])
+            self.client.force_authenticate(self.user)
+            self.assertEqual(self.statuses(21), [200] * 20 + [429])
+
+    def test_refills_over_time(self):
+        from unittest import mock
+        with self.rates(anon='2/s'), mock.patch('api.throttling.monotonic') as clock:
+            clock.return_value = 1000.0
+            self.assertEqual(self.statuses(3), [200, 200, 429])
+            clock.return_value = 1000.5
+            self.assertEqual(self.statuses(2), [200, 429])
+
+    def test_shared_cache_store(self):
+        cache.clear()
+        with self.rates(API_THROTTLE_CACHE_ALIAS='default'):
+            self.assertEqual(self.statuses(11), [200] * 10 + [429])
+        self.assertTrue(cache.get('api:throttle:anon:127.0.0.1'))
+
+    def test_full_buckets_are_pruned(self):
+        from .throttling import LocalBucketStore
+        store = LocalBucketStore(shards=1, prune_above=3)
+        for i in range(3):
+            store.consume(f'anon:{i}', 1, 0.0001, 10)
+        time.sleep(0.001)
+        store.consume('anon:new', 1, 0.0001, 10)
+        self.assertEqual(list(store.shards[0].buckets), ['anon:new'])
+
+    def test_pruning_waits_for_the_shard_to_double(self):
+        from .throttling import LocalBucketStore
+        store = LocalBucketStore(shards=1, prune_above=3)
+        shard = store.shards[0]
+        for i in range(4):
+            store.consume(f'anon:{i}', 1, 60, 10)
+        # Nothing was full, so the next sweep waits until 8 keys
+        self.assertEqual(shard.prune_at, 8)
+        with mock.patch.object(store, 'prune', wraps=store.prune) as prune:
+            for i in range(4, 8):
+                store.consume(f'anon:{i}', 1, 60, 10)
+            prune.assert_not_called()
+            store.consume('anon:8', 1, 60, 10)
+            prune.assert_called_once()
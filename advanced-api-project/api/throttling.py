@@ -0,0 +1,208 @@
+import math
+import threading
+from collections import Counter
+from functools import lru_cache
+from time import monotonic, time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import Signal
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+# ------------------------------------------------
+# Token-bucket throttling
+# Every client (user pk, or address when anonymous) has a bucket holding up to
+# N tokens for a rate of "N/period", refilled at N per period. A request
+# spends its cost in tokens: searches cost more than plain reads. A bucket is
+# kept as a single number, the time at which it will be full again (GCRA),
+# so a check is one dict lookup and one store.
+#
+# Buckets live in an in-process dict split into shards, each behind its own
+# lock, so concurrent threads rarely wait on each other. A shard drops its
+# full buckets once it has doubled in size since the last sweep, so the sweep
+# is paid for by the inserts that grew it. Set
+# API_THROTTLE_CACHE_ALIAS to a shared cache to throttle across workers.
+# ------------------------------------------------
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Sent for every rejected request, for metrics exporters.
+request_throttled = Signal()  # scope, key, cost, wait
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``'100/min'`` -> ``(100, 60)``."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class BucketShard:
+    __slots__ = ('buckets', 'lock', 'prune_at')
+
+    def __init__(self, prune_at):
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.prune_at = prune_at
+
+
+class LocalBucketStore:
+    """
+    Buckets in this process only. A shard past ``prune_above`` keys drops
+    its full buckets whenever it has grown to twice its size after the last
+    sweep, so each insert pays O(1) for pruning on average.
+    """
+
+    def __init__(self, shards=64, prune_above=4096):
+        self.shards = [BucketShard(prune_above) for _ in range(shards)]
+        self.prune_above = prune_above
+
+    def consume(self, key, cost, interval, capacity):
+        """
+        Spend ``cost`` tokens from ``key``'s bucket, which holds ``capacity``
+        and gains one every ``interval`` seconds. Returns 0 if allowed,
+        otherwise the seconds until the request would be.
+        """
+        shard = self.shards[hash(key) % len(self.shards)]
+        buckets = shard.buckets
+        with shard.lock:
+            now = monotonic()
+            full_at = max(buckets.get(key, now), now) + cost * interval
+            wait = full_at - now - capacity * interval
+            if wait > 0:
+                return wait
+            buckets[key] = full_at
+            if len(buckets) > shard.prune_at:
+                self.prune(shard, now)
+        return 0
+
+    def prune(self, shard, now):
+        """Drop ``shard``'s full buckets. Call with its lock held."""
+        buckets = shard.buckets
+        for stale in [key for key, full_at in buckets.items() if full_at <= now]:
+            del buckets[stale]
+        shard.prune_at = max(self.prune_above, 2 * len(buckets))
+
+    def clear(self):
+        for shard in self.shards:
+            with shard.lock:
+                shard.buckets.clear()
+                shard.prune_at = self.prune_above
+
+
+class CacheBucketStore:
+    """
+    Buckets in a Django cache shared by several workers. The read and the
+    write are separate round trips, so concurrent requests from one client
+    can overshoot its limit by the number in flight.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def consume(self, key, cost, interval, capacity):
+        cache_key = f'api:throttle:{key}'
+        now = time()  # wall clock: shared between hosts
+        full_at = max(self.cache.get(cache_key, now), now) + cost * interval
+        wait = full_at - now - capacity * interval
+        if wait > 0:
+            return wait
+        self.cache.set(cache_key, full_at, math.ceil(full_at - now))
+        return 0
+
+
+class ThrottleMetrics:
+    """
+    Allowed/throttled request counts per scope since start-up. Counters are
+    spread over shards picked by thread so increments hardly ever contend.
+    """
+
+    def __init__(self, shards=16):
+        self.shards = [(Counter(), threading.Lock()) for _ in range(shards)]
+
+    def incr(self, scope, outcome):
+        counter, lock = self.shards[threading.get_ident() % len(self.shards)]
+        with lock:
+            counter[scope, outcome] += 1
+
+    def snapshot(self):
+        """``{'anon': {'allowed': 10, 'throttled': 2}, ...}``"""
+        totals = Counter()
+        for counter, lock in self.shards:
+            with lock:
+                totals.update(counter)
+        result = {}
+        for (scope, outcome), count in totals.items():
+            result.setdefault(scope, {'allowed': 0, 'throttled': 0})[outcome] = count
+        return result
+
+    def reset(self):
+        for counter, lock in self.shards:
+            with lock:
+                counter.clear()
+
+
+local_store = LocalBucketStore()
+metrics = ThrottleMetrics()
+
+
+def get_store():
+    alias = getattr(settings, 'API_THROTTLE_CACHE_ALIAS', None)
+    return CacheBucketStore(caches[alias]) if alias else local_store
+
+
+@lru_cache(maxsize=None)
+def search_params(view_class):
+    """The search query parameters of ``view_class``'s filter backends."""
+    params = (getattr(backend, 'search_param', None) for backend in getattr(view_class, 'filter_backends', ()))
+    return tuple(param for param in params if param)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttles by ``DEFAULT_THROTTLE_RATES['user']`` for authenticated users
+    and ``['anon']`` for everyone else, e.g. ``'600/min'`` (a bucket of 600
+    refilled at 10 a second). A scope without a rate is not throttled.
+    """
+    search_cost = 5
+    default_cost = 1
+
+    def get_scope(self, request):
+        return 'user' if request.user and request.user.is_authenticated else 'anon'
+
+    def get_key(self, request, scope):
+        if scope == 'user':
+            return f'{scope}:{request.user.pk}'
+        # get_ident() only reads META; the Django request has it without
+        # going through Request.__getattr__.
+        return f'{scope}:{self.get_ident(request._request)}'
+
+    def get_cost(self, request, view):
+        """Search runs a LIKE over every title, so it spends more tokens."""
+        params = request.query_params
+        for search_param in search_params(type(view)):
+            if search_param in params and params[search_param].strip():
+                return self.search_cost
+        return self.default_cost
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        count, period = parse_rate(rate)
+        cost = self.get_cost(request, view)
+        key = self.get_key(request, scope)
+        wait = get_store().consume(key, cost, period / count, count)
+        if wait:
+            self.wait_seconds = wait
+            metrics.incr(scope, 'throttled')
+            request_throttled.send(sender=type(self), scope=scope, key=key, cost=cost, wait=wait)
+            return False
+        metrics.incr(scope, 'allowed')
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -4,7 +4,12 @@ from .views import (
     BookDetailView,
     BookCreateView,
     BookUpdateView,
-    BookDeleteView
+    BookDeleteView,
+    BookImportView,
+    BookExportView,
+    BookChangesView,
+    AuthorListView,
+    AuthorDetailView,
 )
 
 urlpatterns = [
@@ -13,4 +18,9 @@ urlpatterns = [
     path('books/create/', BookCreateView.as_view(), name='book-create'),
     path('books/update/<int:pk>/', BookUpdateView.as_view(), name='book-update'),
     path('books/delete/<int:pk>/', BookDeleteView.as_view(), name='book-delete'),
+    path('books/import.<str:fmt>', BookImportView.as_view(), name='book-import'),
+    path('books/export.<str:fmt>', BookExportView.as_view(), name='book-export'),
+    path('books/changes/', BookChangesView.as_view(), name='book-changes'),
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),
 ]
\ No newline at end of file
@@ -4,26 +4,40 @@ from rest_framework.filters import SearchFilter
 from rest_framework.filters import OrderingFilter
 from django_filters import rest_framework
 from rest_framework import filters
-from .models import Book
-from .serializers import BookSerializer
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
+from . import bulk, changes
+from .cache import CachedResponseMixin
+from .filters import BookFilter
+from .models import Author, Book, BookChange
+from .pagination import KeysetPagination
+from .projection import FieldProjectionMixin
+from .serializers import AuthorSerializer, BookSerializer
 
 
 # ------------------------------------------------
 # List all books with filtering, search, ordering
-# Anyone can read
+# Anyone can read; ?fields= / ?expand=author pick the output
+# Responses are cached until the next Book/Author write
 # ------------------------------------------------
-class BookListView(generics.ListAPIView):
+class BookListView(CachedResponseMixin, FieldProjectionMixin, generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    # Cursor pagination, only when ?cursor= or ?page_size= is given
+    pagination_class = KeysetPagination
+
     # Filtering, Searching, Ordering
     filter_backends = [rest_framework.DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
 
 
     # ---- FILTERING ----
-    filterset_fields = ['title', 'author', 'publication_year']
+    filterset_class = BookFilter  # title, author, publication_year, title_prefix
 
     # ---- SEARCH ----
     search_fields = ['title', 'author__name']
@@ -32,11 +46,15 @@ class BookListView(generics.ListAPIView):
     ordering_fields = ['title', 'publication_year']
     ordering = ['title']  # default ordering
 
+    # Rows are rendered straight from values_list() (FastListSerializer)
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fast_serialization': True}
+
 
 # ------------------------------------------------
-# Retrieve a single book
+# Retrieve a single book (?fields= / ?expand= and caching as above)
 # ------------------------------------------------
-class BookDetailView(generics.RetrieveAPIView):
+class BookDetailView(CachedResponseMixin, FieldProjectionMixin, generics.RetrieveAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -66,4 +84,112 @@ class BookUpdateView(generics.UpdateAPIView):
 class BookDeleteView(generics.DestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
-    permission_classes = [IsAdminUser]
\ No newline at end of file
+    permission_classes = [IsAdminUser]
+
+
+# ------------------------------------------------
+# Authors with their books nested, oldest first
+# Books come from one prefetch query for the whole page, capped per author,
+# so the query count doesn't grow with the number of authors or books.
+# ------------------------------------------------
+class AuthorPagination(KeysetPagination):
+    opt_in = False
+
+
+class AuthorBooksMixin(FieldProjectionMixin):
+    queryset = Author.objects.order_by('name')
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    books_per_author = 20
+
+    def get_related_queryset(self, name, queryset):
+        if name == 'books':
+            # One query for the whole page: ROW_NUMBER() per author, keep the
+            # first N. (A sliced Prefetch queryset would need a to_attr.)
+            ordering = ('publication_year', 'id')
+            rank = Window(RowNumber(), partition_by=F('author'), order_by=ordering)
+            return queryset.annotate(author_rank=rank).filter(author_rank__lte=self.books_per_author).order_by(*ordering)
+        return queryset
+
+
+class AuthorListView(AuthorBooksMixin, generics.ListAPIView):
+    pagination_class = AuthorPagination
+
+
+class AuthorDetailView(AuthorBooksMixin, generics.RetrieveAPIView):
+    pass
+
+
+# ------------------------------------------------
+# Bulk import from a CSV or NDJSON request body
+# (authenticated users), e.g. POST books/import.csv
+# ------------------------------------------------
+class BookImportView(generics.GenericAPIView):
+    queryset = Book.objects.all()
+    permission_classes = [IsAuthenticated]
+    default_chunk_size = 1000
+    max_chunk_size = 5000
+
+    def post(self, request, fmt):
+        if fmt not in bulk.FORMATS:
+            raise NotFound(f'Unsupported format "{fmt}".')
+        try:
+            chunk_size = min(max(int(request.query_params['chunk_size']), 1), self.max_chunk_size)
+        except (KeyError, ValueError):
+            chunk_size = self.default_chunk_size
+        # The body is read line by line; request.data is never touched.
+        lines = request.stream or []
+        report = bulk.import_books(bulk.READERS[fmt](lines), chunk_size)
+        return Response(report.as_dict())
+
+
+# ------------------------------------------------
+# Streamed export as CSV or NDJSON, with the same
+# filters/search/ordering as the list view
+# ------------------------------------------------
+class BookExportView(generics.GenericAPIView):
+    queryset = Book.objects.all()
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = BookListView.filter_backends
+    filterset_class = BookListView.filterset_class
+    search_fields = BookListView.search_fields
+    ordering_fields = BookListView.ordering_fields
+    ordering = ['id']
+
+    def get(self, request, fmt):
+        if fmt not in bulk.WRITERS:
+            raise NotFound(f'Unsupported format "{fmt}".')
+        writer, content_type = bulk.WRITERS[fmt]
+        response = StreamingHttpResponse(writer(self.filter_queryset(self.get_queryset())), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+        return response
+
+
+# ------------------------------------------------
+# Delta sync: ids of books inserted, updated and
+# deleted since a cursor, e.g. GET books/changes/?since=42
+# Without ?since= only the current cursor is returned,
+# to start from right after a full download.
+# ------------------------------------------------
+class BookChangesView(generics.GenericAPIView):
+    queryset = BookChange.objects.all()
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    default_limit = 1000
+    max_limit = 10000
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': str(changes.head_cursor()), 'has_more': False,
+                             'inserted': [], 'updated': [], 'deleted': []})
+        try:
+            since = int(since)
+        except ValueError:
+            raise ValidationError({'since': ['Invalid cursor.']})
+        if since < 0:
+            raise ValidationError({'since': ['Invalid cursor.']})
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        return Response(changes.changes_since(since, min(max(limit, 1), self.max_limit)))
@@ -0,0 +1,72 @@
+"""
+Time BookSerializer's regular path against the values_list() fast path.
+
+Renders GET /books/-style JSON for 10, 100, 1000 and 10000 rows, from a
+queryset and from a list of instances (a paginated page), checks that both
+paths produce identical bytes, and runs against a throwaway test database:
+
+    python benchmarks/book_serialization.py [--sizes 10 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'advanced_api_project.settings')
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Author, Book
+from api.serializers import BookSerializer
+
+
+def render(data, fast):
+    serializer = BookSerializer(data, many=True, context={'fast_serialization': fast})
+    return JSONRenderer().render(serializer.data)
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        authors = Author.objects.bulk_create(Author(name=f'Author {i}') for i in range(50))
+        Book.objects.bulk_create(
+            Book(title=f'Book title number {i}', publication_year=1900 + i % 120, author=authors[i % 50])
+            for i in range(max(args.sizes))
+        )
+        print(f"{'rows':>6}  {'source':<9} {'regular ms':>11} {'fast ms':>9} {'speed-up':>9}")
+        for size in args.sizes:
+            queryset = Book.objects.order_by('title')[:size]
+            for source, make_data in (('queryset', lambda: queryset.all()), ('instances', lambda: list(queryset))):
+                regular, regular_bytes = best_of(args.repeat, lambda: render(make_data(), False))
+                fast, fast_bytes = best_of(args.repeat, lambda: render(make_data(), True))
+                assert regular_bytes == fast_bytes, f'output differs at {size} rows ({source})'
+                print(f"{size:>6}  {source:<9} {regular * 1000:>11.2f} {fast * 1000:>9.2f} {regular / fast:>8.1f}x")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure the per-request cost of TokenBucketThrottle under concurrent threads.
+
+Calls allow_request() directly, the way APIView.check_throttles() does, from
+1, 4 and 16 threads, each thread a different client, with rates high enough
+that nothing is rejected. DRF's AnonRateThrottle on the local-memory cache
+is timed alongside for reference:
+
+    python benchmarks/throttle_overhead.py [--threads 1 4 16] [--calls 20000]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'advanced_api_project.settings')
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from api.throttling import TokenBucketThrottle, local_store
+from api.views import BookListView
+
+RATES = {'anon': '100000000/s', 'user': '100000000/s'}
+
+
+def make_request(client, search):
+    path = '/api/books/?search=tolkien' if search else '/api/books/'
+    request = Request(APIRequestFactory().get(path, REMOTE_ADDR=f'10.0.{client // 250}.{client % 250}'))
+    request.user = AnonymousUser()
+    return request
+
+
+def run(throttle_class, threads, calls, search):
+    """Mean microseconds per allow_request() call, as seen by each thread."""
+    view = BookListView()
+    requests = [make_request(client, search) for client in range(threads)]
+    timings = [0.0] * threads
+    barrier = threading.Barrier(threads)
+
+    def worker(index):
+        request = requests[index]
+        barrier.wait()
+        start = time.perf_counter()
+        for _ in range(calls):
+            # A new throttle per request, as DRF does
+            assert throttle_class().allow_request(request, view)
+        timings[index] = time.perf_counter() - start
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(timings) / (threads * calls) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7}  {'request':<7} {'token bucket µs':>16} {'drf anon µs':>12}")
+    with override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': RATES}):
+        AnonRateThrottle.THROTTLE_RATES = RATES
+        for threads in args.threads:
+            for search in (False, True):
+                local_store.clear()
+                cache.clear()
+                bucket = run(TokenBucketThrottle, threads, args.calls, search)
+                drf = run(AnonRateThrottle, threads, args.calls // 10, search)
+                label = 'search' if search else 'list'
+                print(f"{threads:>7}  {label:<7} {bucket:>16.2f} {drf:>12.2f}")
+    print('Per-call times include waiting for the GIL; divide by the thread count for CPU cost.')
+
+
+if __name__ == '__main__':
+    main()
@@ -89,6 +89,27 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The permission cache (bookshelf/backends.py) is invalidated by signals in
+# whichever process made the change, so every worker must read the same
+# cache: local memory would leave the other processes serving stale
+# permissions. The database cache lives beside the users it describes, so
+# every worker shares it and no other database's entries can leak in.
+# Create its table with `python manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'permissions': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'bookshelf_permission_cache',
+        'KEY_PREFIX': 'libraryproject',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +157,13 @@ LOGOUT_REDIRECT_URL = 'login'
 
 AUTH_USER_MODEL = 'bookshelf.CustomUser'
 
+# Permission sets are cached across requests (bookshelf/backends.py).
+# The timeout bounds staleness from writes that skip the signals (raw SQL,
+# queryset.update()).
+AUTHENTICATION_BACKENDS = ['bookshelf.backends.CachedModelBackend']
+PERMISSION_CACHE_ALIAS = 'permissions'
+PERMISSION_CACHE_TIMEOUT = 60
+
 # Media settings (for profile photos)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+# -----------------------------
+# Cross-request permission cache
+# ModelBackend only caches a user's permissions on the user object, which
+# is loaded afresh for every request, so each permission_required check
+# costs a user-permission and a group-permission query. Here the set is
+# kept in the cache under the user id, tagged with a permissions version.
+# Group permission changes bump the version (outdating every entry); a
+# user's own group/permission changes drop just that user's entry. See
+# signals.py. The version and the entry are read together, so a hit costs
+# one round trip even on the database cache.
+# -----------------------------
+VERSION_KEY = 'bookshelf:perms:version'
+
+
+def get_cache():
+    return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+
+def get_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Each entry stores the version it was computed under. Restarting a
+        # lost counter at the current time means no old entry matches it.
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def cache_key(user_id):
+    return f'bookshelf:perms:{user_id}'
+
+
+def invalidate_user(user_id):
+    get_cache().delete(cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose permission sets outlive the request."""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            cache = get_cache()
+            key = cache_key(user_obj.pk)
+            found = cache.get_many([VERSION_KEY, key])
+            version = found.get(VERSION_KEY) or get_version()
+            cached_version, perms = found.get(key, (None, None))
+            if cached_version != version:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, (version, perms), getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300))
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
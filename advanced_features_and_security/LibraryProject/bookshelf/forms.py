@@ -6,7 +6,7 @@ from .models import Book
 class BookForm(forms.ModelForm):
     class Meta:
         model = Book
-        fields = ['title', 'author', 'published_date', 'description']
+        fields = ['title', 'author', 'publication_year']
 
     # Optional: Custom validation to prevent XSS-like input
     def clean_title(self):
@@ -14,11 +14,6 @@ class BookForm(forms.ModelForm):
         # Remove unwanted HTML tags or scripts
         return forms.utils.escape(title)
 
-    def clean_description(self):
-        description = self.cleaned_data['description']
-        # Escape HTML to prevent XSS
-        return forms.utils.escape(description)
-
 # Example search form for books
 class BookSearchForm(forms.Form):
     query = forms.CharField(max_length=100, required=True)
@@ -0,0 +1,47 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import bump_version, invalidate_user
+
+User = get_user_model()
+
+
+# -----------------------------
+# Keep the permission cache (backends.py) in step with the database.
+# Invalidation waits for the commit; done earlier, a concurrent request
+# could re-cache the permissions it still sees from before the write.
+# -----------------------------
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_access_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # group.user_set / permission.user_set: possibly many users
+        transaction.on_commit(bump_version)
+    else:
+        transaction.on_commit(partial(invalidate_user, instance.pk))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(bump_version)
+
+
+# Deletes cascade through the m2m tables without m2m_changed
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def access_deleted(sender, **kwargs):
+    transaction.on_commit(bump_version)
+
+
+# is_superuser/is_active feed into the cached set too
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.pk))
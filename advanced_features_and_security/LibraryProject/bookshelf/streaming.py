@@ -0,0 +1,32 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+ROWS_MARKER = '<!-- streamed rows -->'
+
+
+def render_streaming(request, template_name, row_template_name, rows, context=None, chunk_size=2000):
+    """
+    Stream ``template_name`` with its ``{{ rows }}`` slot filled by
+    ``row_template_name`` rendered over ``rows`` (a queryset, ideally of
+    ``values()``), ``chunk_size`` rows at a time. The page head goes out
+    before the first row is fetched, and only one chunk of rows is held in
+    memory at once.
+    """
+    page = render_to_string(template_name, {**(context or {}), 'rows': mark_safe(ROWS_MARKER)}, request)
+    if ROWS_MARKER not in page:
+        # The template left the slot out, e.g. in an empty-state branch
+        return StreamingHttpResponse([page])
+    head, tail = page.split(ROWS_MARKER)
+    row_template = get_template(row_template_name)
+
+    def content():
+        yield head
+        iterator = rows.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield row_template.render({'books': chunk})
+        yield tail
+
+    return StreamingHttpResponse(content())
@@ -0,0 +1,106 @@
+from django.contrib.auth.decorators import permission_required
+from django.contrib.auth.models import Group, Permission
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .backends import get_cache
+from .models import Book, CustomUser
+
+
+# Same guard as views.book_list
+@permission_required('bookshelf.can_view', raise_exception=True)
+def book_list(request):
+    return HttpResponse(', '.join(Book.objects.values_list('title', flat=True)))
+
+
+# Local memory, so a cache hit costs no query at all
+@override_settings(PERMISSION_CACHE_ALIAS='default')
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.can_view = Permission.objects.get(codename='can_view')
+        self.can_edit = Permission.objects.get(codename='can_edit')
+        self.readers = Group.objects.create(name='Readers')
+        self.readers.permissions.add(self.can_view)
+        self.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'password123')
+        self.user.groups.add(self.readers)
+        Book.objects.create(title='1984', author='George Orwell', publication_year=1949)
+
+    def fresh_user(self):
+        # What AuthenticationMiddleware hands each request
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def get_book_list(self):
+        request = RequestFactory().get('/books/')
+        request.user = self.fresh_user()
+        try:
+            return book_list(request).status_code
+        except PermissionDenied:
+            return 403
+
+    def test_later_requests_skip_permission_queries(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(2):  # user permissions, group permissions
+            self.assertTrue(user.has_perm('bookshelf.can_view'))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            for perm in ('can_view', 'can_create', 'can_edit', 'can_delete'):
+                user.has_perm(f'bookshelf.{perm}')
+        self.assertEqual(self.get_book_list(), 200)
+
+    def test_group_membership_changes_invalidate(self):
+        self.assertEqual(self.get_book_list(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(self.readers)
+        self.assertEqual(self.get_book_list(), 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.readers.user_set.add(self.user)
+        self.assertEqual(self.get_book_list(), 200)
+
+    def test_group_permission_changes_invalidate(self):
+        self.assertEqual(self.get_book_list(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.readers.permissions.remove(self.can_view)
+        self.assertEqual(self.get_book_list(), 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.readers.permissions.add(self.can_view)
+        self.assertEqual(self.get_book_list(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.readers.delete()
+        self.assertEqual(self.get_book_list(), 403)
+
+    def test_user_permission_changes_invalidate(self):
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_edit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.can_edit)
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_edit'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.can_edit.user_set.clear()
+        self.assertFalse(self.fresh_user().has_perm('bookshelf.can_edit'))
+
+    def test_invalidation_waits_for_commit(self):
+        self.assertEqual(self.get_book_list(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.readers.permissions.remove(self.can_view)
+            # Still uncommitted, so nothing a request caches now is outdated
+            self.assertEqual(self.get_book_list(), 200)
+        self.assertEqual(self.get_book_list(), 403)
+
+    def test_inactive_users_have_no_permissions(self):
+        self.assertEqual(self.get_book_list(), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_book_list(), 403)
+
+
+# The configured cache: entries and the version share the database's table
+@override_settings(PERMISSION_CACHE_ALIAS='permissions')
+class DatabasePermissionCacheTests(PermissionCacheTests):
+    def test_later_requests_skip_permission_queries(self):
+        self.assertTrue(self.fresh_user().has_perm('bookshelf.can_view'))
+        user = self.fresh_user()
+        with self.assertNumQueries(1):  # version and entry in one SELECT
+            for perm in ('can_view', 'can_create', 'can_edit', 'can_delete'):
+                user.has_perm(f'bookshelf.{perm}')
+        self.assertEqual(self.get_book_list(), 200)
@@ -0,0 +1,30 @@
+from django.contrib.auth.models import Permission
+from django.test import RequestFactory, TestCase
+
+from .models import Book, CustomUser
+from .views import book_list
+
+
+class BookListStreamingTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'password123')
+        self.user.user_permissions.add(Permission.objects.get(codename='can_view'))
+
+    def get(self):
+        request = RequestFactory().get('/books/')
+        request.user = CustomUser.objects.get(pk=self.user.pk)
+        response = book_list(request)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_streams_every_book(self):
+        Book.objects.bulk_create(
+            Book(title=f'Book {i}', author='Ursula K. Le Guin', publication_year=1960 + i) for i in range(3)
+        )
+        content = self.get()
+        self.assertEqual(content.count('<li>'), 3)
+        self.assertIn('<strong>Book 2</strong> by Ursula K. Le Guin', content)
+        self.assertIn('(Published: 1962)', content)
+
+    def test_empty_catalog(self):
+        self.assertIn('No books available.', self.get())
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import permission_required
 from .models import Book
 from .forms import BookForm, BookSearchForm
 from .forms import ExampleForm
+from .streaming import render_streaming
 
 
 # Add a new book
@@ -31,10 +32,11 @@ def book_list(request):
     """
     View to list all books.
     Only accessible to users with 'can_view' permission.
+    Streamed: rows are fetched as plain values and rendered a chunk at a time.
     """
-    books = Book.objects.all()  # Query all books
+    books = Book.objects.order_by('pk').values('title', 'author', 'publication_year')
     context = {
-        'books': books,
+        'has_books': books.exists(),
         'example_form': ExampleForm()   # ← Optional: include ExampleForm if needed in template
     }
-    return render(request, 'bookshelf/book_list.html', context)
\ No newline at end of file
+    return render_streaming(request, 'bookshelf/book_list.html', 'bookshelf/book_list_rows.html', books, context)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    Small in-process LRU of token key -> (user, token), with a TTL.
+
+    Entries are evicted by api.signals when a token is deleted or rotated and
+    when its user is saved (deactivated, made staff, ...) or deleted. Other
+    processes don't see those signals, so the TTL bounds how long they may
+    keep accepting a revoked token.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, expires = entry
+            if expires <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return user, token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (user, token, time.monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def evict(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[0].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[0].pk]
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token + User query for recently seen tokens."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            cached = user, token
+        user, token = cached
+        # Each request gets its own copy, so nothing a view sets on request.user leaks.
+        return copy.copy(user), token
@@ -4,6 +4,27 @@ from django.db import models
 class Book(models.Model):
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
+
+
+class BookChange(models.Model):
+    """
+    Append-only log of Book writes for delta sync (see api.changes). The
+    auto-increment id is the sync cursor; rows for deleted books are the
+    tombstones.
+    """
+    INSERT = 'insert'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    KIND_CHOICES = [(INSERT, 'Insert'), (UPDATE, 'Update'), (DELETE, 'Delete')]
+
+    book_id = models.BigIntegerField()  # not a FK: tombstones outlive the book
+    kind = models.CharField(max_length=6, choices=KIND_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def record(cls, kind, book_ids):
+        cls.objects.bulk_create([cls(book_id=pk, kind=kind) for pk in book_ids])
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .changes import is_recording_in_bulk
+from .models import Book, BookChange
+
+
+# Keep CachedTokenAuthentication from accepting revoked tokens or stale users.
+# Rotating a token means deleting it and creating a new key.
+@receiver([post_save, post_delete], sender=Token)
+def evict_token(sender, instance, **kwargs):
+    token_cache.evict(instance.key)
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def evict_user_tokens(sender, instance, **kwargs):
+    token_cache.evict_user(instance.pk)
+
+
+# Delta sync log (api.changes)
+@receiver(post_save, sender=Book)
+def record_book_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw and not is_recording_in_bulk():
+        BookChange.record(BookChange.INSERT if created else BookChange.UPDATE, [instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def record_book_deleted(sender, instance, **kwargs):
+    if not is_recording_in_bulk():
+        BookChange.record(BookChange.DELETE, [instance.pk])
@@ -1,3 +1,187 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .authentication import TokenCache, token_cache
+from .models import Book
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='reader', password='pass')
+        self.token = Token.objects.create(user=self.user)
+        Book.objects.create(title='Dune', author='Frank Herbert')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_requests_skip_the_auth_query(self):
+        url = reverse('book-list')
+        with self.assertNumQueries(2):  # Token + User join, then the books
+            self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(reverse('book-list'))
+        self.token.delete()
+        self.assertEqual(self.client.get(reverse('book-list')).status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse('book-list'))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('book-list')).status_code, 401)
+
+    def test_user_changes_are_picked_up(self):
+        url = reverse('book_all-list')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class TokenCacheTests(APITestCase):
+    def test_lru_bound_and_ttl(self):
+        users = [User(pk=i, username=f'u{i}') for i in range(3)]
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', users[0], 'tok-a')
+        cache.set('b', users[1], 'tok-b')
+        cache.get('a')
+        cache.set('c', users[2], 'tok-c')
+        self.assertEqual((cache.get('a') is None, cache.get('b') is None, cache.get('c') is None),
+                         (False, True, False))
+
+        expired = TokenCache(maxsize=2, ttl=0)
+        expired.set('a', users[0], 'tok-a')
+        self.assertIsNone(expired.get('a'))
+        self.assertEqual(len(expired), 0)
+
+
+class BookBulkWriteTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('book_all-bulk')
+
+    def test_bulk_create_reports_each_item(self):
+        payload = [{'title': f'Book {i}', 'author': 'A'} for i in range(1200)]
+        payload.insert(1, {'title': 'No author'})
+        # 4 chunks of up to 333: SAVEPOINT, INSERT, change-log INSERT, RELEASE each.
+        with self.assertNumQueries(16):
+            response = self.client.post(self.url, payload, format='json')
+        results = response.data['results']
+        self.assertEqual(len(results), 1201)
+        self.assertEqual(results[1]['status'], 'invalid')
+        self.assertIn('author', results[1]['errors'])
+        self.assertEqual(Book.objects.count(), 1200)
+        self.assertEqual(Book.objects.get(pk=results[0]['id']).title, 'Book 0')
+
+    def test_bulk_update_by_ids(self):
+        books = Book.objects.bulk_create(Book(title=f'Book {i}', author='A') for i in range(3))
+        payload = [
+            {'id': books[0].pk, 'title': 'Renamed'},
+            {'id': books[1].pk, 'author': 'B'},
+            {'id': books[2].pk, 'title': 'x' * 300},
+            {'id': 999999, 'title': 'Missing'},
+        ]
+        with self.assertNumQueries(5):  # in_bulk, SAVEPOINT, UPDATE, change-log INSERT, RELEASE
+            response = self.client.patch(self.url, payload, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['updated', 'updated', 'invalid', 'not_found'])
+        self.assertEqual(list(Book.objects.order_by('pk').values_list('title', 'author')),
+                         [('Renamed', 'A'), ('Book 1', 'B'), ('Book 2', 'A')])
+
+    def test_bulk_delete_by_ids(self):
+        books = Book.objects.bulk_create(Book(title=f'Book {i}', author='A') for i in range(3))
+        response = self.client.delete(self.url, {'ids': [books[0].pk, books[2].pk, 999999]}, format='json')
+        self.assertEqual([r['status'] for r in response.data['results']], ['deleted', 'deleted', 'not_found'])
+        self.assertEqual(list(Book.objects.values_list('pk', flat=True)), [books[1].pk])
+
+    def test_bulk_delete_reports_invalid_ids(self):
+        book = Book.objects.create(title='Book', author='A')
+        ids = [{'x': 1}, book.pk, 'abc', True, 10 ** 23, [2]]
+        response = self.client.delete(self.url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['invalid', 'deleted', 'invalid', 'invalid', 'invalid', 'invalid'])
+        self.assertFalse(Book.objects.exists())
+        response = self.client.patch(self.url, [{'id': 10 ** 23, 'title': 'Huge'}], format='json')
+        self.assertEqual(response.data['results'][0]['status'], 'not_found')
+
+    def test_admin_only_and_payload_shape(self):
+        self.assertEqual(self.client.post(self.url, {'title': 'Not a list'}, format='json').status_code, 400)
+        self.client.force_authenticate(User.objects.create_user(username='reader'))
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 403)
+
+
+class BookChangesTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(reverse('book-changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_inserted_updated_deleted_since_cursor(self):
+        kept = Book.objects.create(title='Kept', author='A')
+        edited = Book.objects.create(title='Edited', author='A')
+        removed = Book.objects.create(title='Removed', author='A')
+        cursor = self.sync()['cursor']
+        self.assertEqual(self.sync(cursor)['inserted'], [])
+
+        edited.title = 'Edited again'
+        edited.save()
+        removed_id = removed.pk
+        removed.delete()
+        new = Book.objects.create(title='New', author='B')
+        Book.objects.create(title='Short-lived', author='B').delete()
+
+        changes = self.sync(cursor)
+        self.assertEqual((changes['inserted'], changes['updated'], changes['deleted']),
+                         ([new.pk], [edited.pk], [removed_id]))
+        self.assertEqual(self.sync(changes['cursor'])['updated'], [])
+        self.assertNotIn(kept.pk, changes['inserted'] + changes['updated'])
+
+    def test_pages_with_has_more(self):
+        cursor = self.sync()['cursor']
+        books = [Book.objects.create(title=f'Book {i}', author='A') for i in range(5)]
+        seen = []
+        while True:
+            changes = self.sync(cursor, limit=2)
+            seen += changes['inserted']
+            cursor = changes['cursor']
+            if not changes['has_more']:
+                break
+        self.assertEqual(seen, [book.pk for book in books])
+
+    def test_bulk_writes_are_logged(self):
+        cursor = self.sync()['cursor']
+        url = reverse('book_all-bulk')
+        created = self.client.post(url, [{'title': 'A', 'author': 'X'}, {'title': 'B', 'author': 'X'}], format='json')
+        first, second = [r['id'] for r in created.data['results']]
+        after_create = self.sync(cursor)
+        self.assertEqual(after_create['inserted'], [first, second])
+
+        before = Book.objects.get(pk=first).updated_at
+        self.client.patch(url, [{'id': first, 'title': 'A2'}], format='json')
+        self.client.delete(url, {'ids': [second]}, format='json')
+        changes = self.sync(after_create['cursor'])
+        self.assertEqual((changes['updated'], changes['deleted']), ([first], [second]))
+        self.assertGreater(Book.objects.get(pk=first).updated_at, before)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('book-changes'), {'since': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_limit(self):
+        response = self.client.get(reverse('book-changes'), {'since': '0', 'limit': 'ten'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), ['limit'])
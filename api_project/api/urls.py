@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookList, BookViewSet
+from .views import BookChanges, BookList, BookViewSet
 
 # Create router
 router = DefaultRouter()
@@ -8,6 +8,7 @@ router.register(r'books_all', BookViewSet, basename='book_all')
 
 urlpatterns = [
     path('books/', BookList.as_view(), name='book-list'),
+    path('books/changes/', BookChanges.as_view(), name='book-changes'),
     # Router URLs for all CRUD operations
     path('', include(router.urls)),
 ]
\ No newline at end of file
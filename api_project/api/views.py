@@ -1,6 +1,12 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import generics, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from .models import Book
+from rest_framework.response import Response
+from . import changes
+from .models import Book, BookChange
 from .serializers import BookSerializer
 
 class BookList(generics.ListAPIView):
@@ -8,7 +14,136 @@ class BookList(generics.ListAPIView):
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]  # Only logged-in users can access
 
+class BookChanges(generics.GenericAPIView):
+    """
+    Delta sync: ``GET books/changes/?since=<cursor>`` returns the ids of books
+    inserted, updated and deleted since ``cursor``, plus the cursor to pass
+    next time. Follow ``has_more`` until it is false. Without ``since`` only
+    the current cursor is returned, for use right after a full download.
+    """
+    queryset = BookChange.objects.all()
+    permission_classes = [IsAuthenticated]
+    default_limit = 1000
+    max_limit = 10000
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': str(changes.head_cursor()), 'has_more': False,
+                             'inserted': [], 'updated': [], 'deleted': []})
+        try:
+            since = int(since)
+        except ValueError:
+            raise ValidationError({'since': ['Invalid cursor.']})
+        if since < 0:
+            raise ValidationError({'since': ['Invalid cursor.']})
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        return Response(changes.changes_since(since, min(max(limit, 1), self.max_limit)))
+
 class BookViewSet(viewsets.ModelViewSet):
+    """
+    CRUD for admins, plus batch writes on ``books_all/bulk/``:
+
+    - POST   a list of books to create
+    - PATCH  a list of partial books, each with its ``id``
+    - DELETE ``{"ids": [...]}``
+
+    Items are validated individually and written in chunks, one transaction
+    per chunk. The response lists a status for every item, in order, so an
+    invalid item never blocks the rest.
+    """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
-    permission_classes = [IsAdminUser]  # Only admin users can create/update/delete
\ No newline at end of file
+    permission_classes = [IsAdminUser]  # Only admin users can create/update/delete
+    bulk_chunk_size = 333  # one INSERT per chunk within SQLite's 999-parameter limit (3 columns)
+    bulk_max_items = 10000
+
+    def get_bulk_items(self, data):
+        if not isinstance(data, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if len(data) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [f'At most {self.bulk_max_items} items per request.']})
+        return data
+
+    def is_bulk_id(self, pk):
+        # bool is an int too, and a pk past 64 bits overflows the query
+        return isinstance(pk, int) and not isinstance(pk, bool) and 0 < pk < 2 ** 63
+
+    def chunks(self, items):
+        for start in range(0, len(items), self.bulk_chunk_size):
+            yield items[start:start + self.bulk_chunk_size]
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request):
+        items = self.get_bulk_items(request.data)
+        results = [None] * len(items)
+        valid = []
+        child = self.get_serializer()
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, Book(**child.run_validation(item))))
+            except ValidationError as exc:
+                results[index] = {'status': 'invalid', 'errors': exc.detail}
+        for chunk in self.chunks(valid):
+            with transaction.atomic():
+                created = Book.objects.bulk_create([book for _, book in chunk])
+                BookChange.record(BookChange.INSERT, [book.pk for book in created])
+            for index, book in chunk:
+                results[index] = {'status': 'created', 'id': book.pk}
+        return Response({'results': results})
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        items = self.get_bulk_items(request.data)
+        results = [None] * len(items)
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        books = Book.objects.in_bulk({pk for pk in ids if self.is_bulk_id(pk)})
+        changed, fields = [], set()
+        for index, (pk, item) in enumerate(zip(ids, items)):
+            book = books.get(pk) if self.is_bulk_id(pk) else None
+            if book is None:
+                results[index] = {'status': 'not_found', 'id': pk}
+                continue
+            serializer = self.get_serializer(book, data=item, partial=True)
+            if not serializer.is_valid():
+                results[index] = {'status': 'invalid', 'id': book.pk, 'errors': serializer.errors}
+                continue
+            for name, value in serializer.validated_data.items():
+                setattr(book, name, value)
+                fields.add(name)
+            changed.append((index, book))
+        # bulk_update() skips auto_now, so stamp updated_at here.
+        now = timezone.now()
+        for chunk in self.chunks(changed):
+            if fields:
+                for _, book in chunk:
+                    book.updated_at = now
+                with transaction.atomic():
+                    Book.objects.bulk_update([book for _, book in chunk], sorted(fields | {'updated_at'}))
+                    BookChange.record(BookChange.UPDATE, [book.pk for _, book in chunk])
+            for index, book in chunk:
+                results[index] = {'status': 'updated', 'id': book.pk}
+        return Response({'results': results})
+
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        ids = self.get_bulk_items(ids)
+        existing = set()
+        for chunk in self.chunks([pk for pk in ids if self.is_bulk_id(pk)]):
+            with transaction.atomic(), changes.recorded_in_bulk():
+                queryset = Book.objects.filter(pk__in=chunk)
+                found = set(queryset.values_list('pk', flat=True))
+                queryset.filter(pk__in=found).delete()
+                BookChange.record(BookChange.DELETE, sorted(found))
+            existing |= found
+        results = []
+        for pk in ids:
+            if not self.is_bulk_id(pk):
+                results.append({'status': 'invalid', 'id': pk, 'errors': {'id': ['A valid integer is required.']}})
+            else:
+                results.append({'status': 'deleted' if pk in existing else 'not_found', 'id': pk})
+        return Response({'results': results})
@@ -0,0 +1,71 @@
+"""
+Count the queries per authenticated request with and without the token cache.
+
+Runs against a throwaway test database:
+
+    python benchmarks/token_auth_queries.py [--requests 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_project.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import CachedTokenAuthentication, token_cache
+from api.models import Book
+from api.views import BookList, BookViewSet
+
+
+def run(client, auth_class, requests):
+    for view in (BookList, BookViewSet):
+        view.authentication_classes = [auth_class]
+    token_cache.clear()
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as ctx:
+        for i in range(requests):
+            url = '/api/books/' if i % 2 else '/api/books_all/'
+            assert client.get(url).status_code == 200
+    elapsed = time.perf_counter() - start
+    auth = sum('authtoken_token' in q['sql'] for q in ctx.captured_queries)
+    return len(ctx.captured_queries) / requests, auth / requests, elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_user(username='bench', is_staff=True)
+        token = Token.objects.create(user=user)
+        Book.objects.bulk_create(Book(title=f'Book {i}', author='Author') for i in range(20))
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        print(f"requests: {args.requests} (BookList and BookViewSet list, alternating)")
+        print(f"{'auth class':<28} {'queries/req':>11} {'auth/req':>9} {'ms/req':>7}")
+        for auth_class in (TokenAuthentication, CachedTokenAuthentication):
+            queries, auth, ms = run(client, auth_class, args.requests)
+            print(f"{auth_class.__name__:<28} {queries:>11.2f} {auth:>9.2f} {ms:>7.2f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -101,6 +101,10 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Loads request.user together with its role (relationship_app/backends.py)
+AUTHENTICATION_BACKENDS = ['relationship_app.backends.ProfileModelBackend']
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
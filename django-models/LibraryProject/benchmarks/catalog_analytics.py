@@ -0,0 +1,151 @@
+"""
+Time relationship_app.analytics (NumPy) against ORM annotate() and pure Python.
+
+Seeds a throwaway test database with ``--books`` rows in each Book table,
+spread over ``--authors`` authors and ``--libraries`` libraries, then
+computes each statistic three ways, checks they agree and prints the best
+of ``--repeat`` runs:
+
+    python benchmarks/catalog_analytics.py [--books 200000] [--authors 2000] [--libraries 20] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LibraryProject.settings')
+django.setup()
+
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from bookshelf.models import Book as ShelfBook
+from relationship_app import analytics
+from relationship_app.models import Author, Book, Library
+
+
+def seed(books, authors, libraries):
+    rng = random.Random(42)
+    ShelfBook.objects.bulk_create(
+        (ShelfBook(title=f'Shelf book {i}', author=f'Author {rng.randrange(authors)}',
+                   publication_year=rng.randint(1900, 2024)) for i in range(books)),
+        batch_size=5000,
+    )
+    author_objs = Author.objects.bulk_create(Author(name=f'Author {i}') for i in range(authors))
+    Book.objects.bulk_create(
+        (Book(title=f'Book {i}', author=rng.choice(author_objs)) for i in range(books)), batch_size=5000
+    )
+    book_ids = list(Book.objects.values_list('pk', flat=True))
+    through = Library.books.through
+    for i in range(libraries):
+        library = Library.objects.create(name=f'Library {i}')
+        held = rng.sample(book_ids, len(book_ids) // 3)
+        through.objects.bulk_create((through(library=library, book_id=pk) for pk in held), batch_size=5000)
+
+
+# ---- publication-year histogram ----
+
+def years_numpy():
+    years = analytics.read_columns(ShelfBook.objects, 'publication_year')[:, 0]
+    return dict(zip(*analytics.year_histogram(years).values()))
+
+
+def years_orm():
+    rows = ShelfBook.objects.order_by('publication_year').values_list('publication_year').annotate(n=Count('pk'))
+    counts = dict(rows)
+    return {year: counts.get(year, 0) for year in range(min(counts), max(counts) + 1)}
+
+
+def years_python():
+    counts = Counter(book.publication_year for book in ShelfBook.objects.all())
+    return {year: counts.get(year, 0) for year in range(min(counts), max(counts) + 1)}
+
+
+# ---- books per author (top 10) ----
+
+def authors_numpy():
+    return analytics.books_per_author_name(analytics.read_strings(ShelfBook.objects, 'author'), 10)
+
+
+def authors_orm():
+    return list(ShelfBook.objects.values_list('author').annotate(n=Count('pk')).order_by('-n', 'author')[:10])
+
+
+def authors_python():
+    counts = Counter(book.author for book in ShelfBook.objects.all())
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:10]
+
+
+# ---- per-library books held and distinct authors ----
+
+def libraries_numpy():
+    books = analytics.read_columns(Book.objects, 'id', 'author_id')
+    pairs = analytics.read_columns(Library.books.through.objects, 'library_id', 'book_id')
+    return {pk: (stats['books'], stats['authors']) for pk, stats in analytics.library_coverage(pairs, books).items()}
+
+
+def libraries_orm():
+    rows = Library.objects.annotate(held=Count('books'), authors=Count('books__author', distinct=True))
+    return {library.pk: (library.held, library.authors) for library in rows}
+
+
+def libraries_python():
+    return {
+        library.pk: (len(library.books.all()), len({book.author_id for book in library.books.all()}))
+        for library in Library.objects.prefetch_related('books')
+    }
+
+
+STATS = [
+    ('year histogram', years_numpy, years_orm, years_python),
+    ('books per author', authors_numpy, authors_orm, authors_python),
+    ('library coverage', libraries_numpy, libraries_orm, libraries_python),
+]
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--books', type=int, default=200_000)
+    parser.add_argument('--authors', type=int, default=2000)
+    parser.add_argument('--libraries', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.books, args.authors, args.libraries)
+        print(f"books: {args.books} per table  authors: {args.authors}  libraries: {args.libraries}")
+        print(f"{'statistic':<17} {'numpy ms':>9} {'orm ms':>9} {'python ms':>10}")
+        for label, *funcs in STATS:
+            (numpy_time, expected), (orm_time, orm), (python_time, python) = (
+                best_of(args.repeat, func) for func in funcs
+            )
+            assert expected == orm == python, f'{label}: results differ'
+            print(f"{label:<17} {numpy_time * 1000:>9.1f} {orm_time * 1000:>9.1f} {python_time * 1000:>10.1f}")
+        start = time.perf_counter()
+        analytics.catalog_report()
+        print(f"full catalog_report(): {(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
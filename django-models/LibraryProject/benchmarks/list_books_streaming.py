@@ -0,0 +1,123 @@
+"""
+Compare peak memory and time-to-first-byte of list_books, buffered vs streamed.
+
+Seeds a throwaway SQLite database with ``--books`` rows, then renders the
+page once per mode, each in a fresh subprocess so peak RSS isn't shared:
+
+    python benchmarks/list_books_streaming.py [--books 1000000] [--authors 1000]
+
+"buffered" is the previous view: every Book instance (author joined in)
+loaded into a list and rendered in one template pass. "streamed" is
+views.list_books, which iterates values() in chunks into a
+StreamingHttpResponse.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LibraryProject.settings')
+
+from django.conf import settings
+
+
+def use_database(path):
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+
+def seed(path, books, authors):
+    use_database(path)
+    from django.core.management import call_command
+    from django.db import connection, transaction
+
+    call_command('migrate', verbosity=0)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany('INSERT INTO relationship_app_author (name) VALUES (%s)',
+                           [(f'Author {i}',) for i in range(authors)])
+        cursor.executemany('INSERT INTO relationship_app_book (title, author_id) VALUES (%s, %s)',
+                           ((f'Book title number {i}', i % authors + 1) for i in range(books)))
+
+
+def buffered(request):
+    from django.db.models import F
+    from django.shortcuts import render
+    from django.template.loader import render_to_string
+    from relationship_app.models import Book
+
+    books = list(Book.objects.annotate(author_name=F('author__name')).order_by('pk'))
+    rows = render_to_string('relationship_app/list_books_rows.html', {'books': books})
+    return render(request, 'relationship_app/list_books.html', {'rows': rows})
+
+
+def peak_rss_kb():
+    # ru_maxrss survives fork+exec, so it would report the parent's peak from
+    # seeding; VmHWM starts afresh with the new process image.
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(mode, path):
+    use_database(path)
+    from django.test import RequestFactory
+    from relationship_app.views import list_books
+
+    request = RequestFactory().get('/books/')
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    response = list_books(request) if mode == 'streamed' else buffered(request)
+    chunks = iter(response.streaming_content if response.streaming else [response.content])
+    size = len(next(chunks))
+    first_byte = time.perf_counter() - start
+    for chunk in chunks:
+        size += len(chunk)
+    print(json.dumps({
+        'ttfb': first_byte,
+        'total': time.perf_counter() - start,
+        'bytes': size,
+        'peak_rss_kb': peak_rss_kb(),
+        'baseline_rss_kb': baseline,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--books', type=int, default=1_000_000)
+    parser.add_argument('--authors', type=int, default=1000)
+    parser.add_argument('--measure', choices=['buffered', 'streamed'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.db)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        seed(db_path, args.books, args.authors)
+        print(f"books: {args.books}")
+        print(f"{'mode':<9} {'ttfb ms':>9} {'total s':>8} {'MB sent':>8} {'peak RSS MB':>12} {'+ over start':>13}")
+        for mode in ('buffered', 'streamed'):
+            cmd = [sys.executable, os.path.abspath(__file__), '--measure', mode, '--db', db_path]
+            result = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+            print(f"{mode:<9} {result['ttfb'] * 1000:>9.1f} {result['total']:>8.2f} "
+                  f"{result['bytes'] / 2**20:>8.1f} {result['peak_rss_kb'] / 1024:>12.1f} "
+                  f"{(result['peak_rss_kb'] - result['baseline_rss_kb']) / 1024:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+from itertools import chain, islice
+
+import numpy as np
+
+from bookshelf.models import Book as ShelfBook
+from .models import Author, Book, Library
+
+# ---------------------------
+# Catalogue analytics
+# Columns are read with values_list() a chunk at a time straight into NumPy
+# arrays, and the aggregates are computed on the arrays: no model instances
+# are built and nothing loops over rows in Python.
+# ---------------------------
+CHUNK_SIZE = 50_000
+
+
+def read_columns(queryset, *fields, dtype=np.int64, chunk_size=CHUNK_SIZE):
+    """``fields`` of ``queryset`` as an ``(rows, len(fields))`` array."""
+    width = len(fields)
+    rows = queryset.order_by().values_list(*fields).iterator(chunk_size=chunk_size)
+    chunks = []
+    while chunk := list(islice(rows, chunk_size)):
+        flat = np.fromiter(chain.from_iterable(chunk), dtype=dtype, count=len(chunk) * width)
+        chunks.append(flat.reshape(-1, width))
+    return np.concatenate(chunks) if chunks else np.empty((0, width), dtype=dtype)
+
+
+def read_strings(queryset, field, chunk_size=CHUNK_SIZE):
+    rows = queryset.order_by().values_list(field, flat=True).iterator(chunk_size=chunk_size)
+    chunks = []
+    while chunk := list(islice(rows, chunk_size)):
+        chunks.append(np.array(chunk, dtype=str))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=str)
+
+
+def year_histogram(years):
+    """Books per year over the full span, empty years included."""
+    if not years.size:
+        return {'years': [], 'counts': []}
+    first = years.min()
+    counts = np.bincount(years - first)
+    return {'years': np.arange(first, first + counts.size).tolist(), 'counts': counts.tolist()}
+
+
+def year_over_year(histogram):
+    """Change in books per year against the year before, absolute and in percent."""
+    counts = np.asarray(histogram['counts'], dtype=np.int64)
+    if counts.size < 2:
+        return []
+    change = np.diff(counts)
+    previous = counts[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = np.where(previous > 0, np.round(change * 100 / previous, 1), np.nan)
+    return [
+        {'year': year, 'books': books, 'change': delta, 'percent': None if np.isnan(pct) else pct}
+        for year, books, delta, pct in zip(
+            histogram['years'][1:], counts[1:].tolist(), change.tolist(), percent.tolist()
+        )
+    ]
+
+
+def top_counts(keys, counts, top=None):
+    """``(key, count)`` pairs by count descending, then key, ``top`` at most."""
+    order = np.lexsort((keys, -counts))[:top]
+    return list(zip(keys[order].tolist(), counts[order].tolist()))
+
+
+def books_per_author_id(author_ids, top=None):
+    counts = np.bincount(author_ids)
+    ids = np.flatnonzero(counts)
+    return top_counts(ids, counts[ids], top)
+
+
+def books_per_author_name(names, top=None):
+    keys, counts = np.unique(names, return_counts=True)
+    return top_counts(keys, counts, top)
+
+
+def library_coverage(pairs, books):
+    """
+    Per library: books held, share of the catalogue held and distinct
+    authors, from ``(library_id, book_id)`` pairs and ``(book_id, author_id)``
+    rows.
+    """
+    if not pairs.size:
+        return {}
+    library_ids, book_ids = pairs[:, 0], pairs[:, 1]
+    author_of = np.zeros(max(book_ids.max(), books[:, 0].max(initial=0)) + 1, dtype=np.int64)
+    author_of[books[:, 0]] = books[:, 1]
+    held = np.bincount(library_ids)
+    # One key per (library, author) pair, so uniques are distinct authors per library
+    stride = author_of.max() + 1
+    keys = np.unique(library_ids * stride + author_of[book_ids])
+    authors = np.bincount(keys // stride, minlength=held.size)
+    total = max(len(books), 1)
+    return {
+        library: {'books': int(held[library]), 'coverage': round(float(held[library]) / total, 4),
+                  'authors': int(authors[library])}
+        for library in np.flatnonzero(held).tolist()
+    }
+
+
+def catalog_report(top_authors=10, chunk_size=CHUNK_SIZE):
+    """Every statistic above, for both Book models, as JSON-ready data."""
+    years = read_columns(ShelfBook.objects, 'publication_year', chunk_size=chunk_size)[:, 0]
+    histogram = year_histogram(years)
+    shelf_authors = read_strings(ShelfBook.objects, 'author', chunk_size=chunk_size)
+
+    books = read_columns(Book.objects, 'id', 'author_id', chunk_size=chunk_size)
+    per_author = books_per_author_id(books[:, 1], top_authors)
+    names = Author.objects.in_bulk([author_id for author_id, _ in per_author])
+    pairs = read_columns(Library.books.through.objects, 'library_id', 'book_id', chunk_size=chunk_size)
+    coverage = library_coverage(pairs, books)
+    libraries = dict(Library.objects.filter(pk__in=coverage).values_list('pk', 'name'))
+
+    return {
+        'bookshelf': {
+            'books': int(years.size),
+            'publication_years': histogram,
+            'year_over_year': year_over_year(histogram),
+            'books_per_author': [
+                {'author': name, 'books': count}
+                for name, count in books_per_author_name(shelf_authors, top_authors)
+            ],
+        },
+        'relationship_app': {
+            'books': len(books),
+            'books_per_author': [
+                {'author_id': author_id, 'author': names[author_id].name, 'books': count}
+                for author_id, count in per_author
+            ],
+            'libraries': [
+                {'library_id': library_id, 'library': libraries[library_id], **stats}
+                for library_id, stats in coverage.items()
+            ],
+        },
+    }
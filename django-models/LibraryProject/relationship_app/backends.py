@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+# ---------------------------
+# Load the role with the user
+# AuthenticationMiddleware fetches request.user through get_user(); joining
+# the profile there means the is_admin/is_librarian/is_member checks in
+# views.py cost no extra query.
+# ---------------------------
+class ProfileModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('userprofile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
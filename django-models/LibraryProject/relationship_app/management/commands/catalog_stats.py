@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from relationship_app import analytics
+
+
+class Command(BaseCommand):
+    help = "Print catalogue statistics: books per year and author, year-over-year change, library coverage."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help="Authors to list per catalogue.")
+        parser.add_argument('--chunk-size', type=int, default=analytics.CHUNK_SIZE)
+        parser.add_argument('--json', action='store_true', help="Print the raw report as JSON.")
+
+    def handle(self, *args, **options):
+        report = analytics.catalog_report(options['top'], options['chunk_size'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        shelf, catalog = report['bookshelf'], report['relationship_app']
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Bookshelf: {shelf['books']} books"))
+        for row in shelf['year_over_year']:
+            percent = '' if row['percent'] is None else f" ({row['percent']:+.1f}%)"
+            self.stdout.write(f"  {row['year']}: {row['books']:>7} {row['change']:+d}{percent}")
+        for row in shelf['books_per_author']:
+            self.stdout.write(f"  {row['author']}: {row['books']}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Library catalogue: {catalog['books']} books"))
+        for row in catalog['books_per_author']:
+            self.stdout.write(f"  {row['author']}: {row['books']}")
+        for row in catalog['libraries']:
+            self.stdout.write(f"  {row['library']}: {row['books']} books ({row['coverage']:.1%}), "
+                              f"{row['authors']} authors")
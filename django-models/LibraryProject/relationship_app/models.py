@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
 
 
@@ -62,10 +62,22 @@ class UserProfile(models.Model):
         return f"{self.user.username} - {self.role}"
 
 
+# Remember the stored role so saving a User only writes the profile back
+# when its role was actually changed
+@receiver(post_init, sender=UserProfile)
+@receiver(post_save, sender=UserProfile)
+def remember_role(sender, instance, **kwargs):
+    instance._saved_role = instance.__dict__.get('role')
+
+
 # Automatically create or update UserProfile when a new User is created
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_or_update_user_profile(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
     if created:
         UserProfile.objects.create(user=instance)
-    else:
-        instance.userprofile.save()
\ No newline at end of file
+    elif User.userprofile.is_cached(instance) and hasattr(instance, 'userprofile'):
+        profile = instance.userprofile
+        if profile.role != profile._saved_role:
+            profile.save(update_fields=['role'])
\ No newline at end of file
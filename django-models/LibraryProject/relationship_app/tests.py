@@ -1,3 +1,171 @@
+import json
+from io import StringIO
+
+from bookshelf.models import Book as ShelfBook
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from . import analytics
+from .models import Author, Book, Library, UserProfile
+
+
+class RoleCheckTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lib', password='password123')
+        UserProfile.objects.filter(user=self.user).update(role='Librarian')
+
+    def test_role_gated_view_loads_role_with_user(self):
+        self.client.force_login(self.user)
+        with self.assertNumQueries(2):  # session, user joined with its profile
+            response = self.client.get(reverse('librarian_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('member_view')).status_code, 302)
+
+    def test_user_without_profile_is_refused(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        self.client.force_login(self.user)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(reverse('librarian_view')).status_code, 302)
+
+    def test_saving_user_leaves_profile_alone(self):
+        user = User.objects.select_related('userprofile').get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):  # profile not loaded: nothing to write back
+            user.save()
+
+    def test_changed_role_is_saved_with_user(self):
+        user = User.objects.select_related('userprofile').get(pk=self.user.pk)
+        user.userprofile.role = 'Admin'
+        user.save()
+        self.assertEqual(UserProfile.objects.get(user=self.user).role, 'Admin')
+        with self.assertNumQueries(1):
+            user.save()
+
+
+class LibraryDetailViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.library = Library.objects.create(name='Central')
+        authors = Author.objects.bulk_create(Author(name=f'Author {i}') for i in range(5))
+        books = Book.objects.bulk_create(
+            Book(title=f'Book {i:03}', author=authors[i % 5]) for i in range(120)
+        )
+        cls.library.books.add(*books)
+        cls.authors = authors
+
+    def get(self, **params):
+        return self.client.get(reverse('library_detail', args=[self.library.pk]), params)
+
+    def test_query_count_does_not_grow_with_books(self):
+        # library, book count, page of books with authors, author choices
+        with self.assertNumQueries(4):
+            response = self.get()
+        books = list(response.context['books'])
+        self.assertEqual(len(books), 50)
+        self.assertEqual(books[0].title, 'Book 000')
+        self.assertContains(response, 'Book 049 by Author 4')
+        with self.assertNumQueries(4):
+            self.get(page=3, sort='-title')
+
+    def test_filter_sort_and_paginate(self):
+        response = self.get(author=self.authors[1].pk, sort='-title')
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 24)
+        self.assertEqual([b.title for b in page.object_list][:2], ['Book 116', 'Book 111'])
+
+        response = self.get(sort='-title', page=2)
+        self.assertEqual(response.context['books'][0].title, 'Book 069')
+        self.assertContains(response, '?sort=-title&amp;page=1')
+        self.assertContains(response, '?sort=-title&amp;page=3')
+
+    def test_bad_params_fall_back(self):
+        response = self.get(author='x', sort='nope', page='999')
+        self.assertEqual(response.context['sort'], 'title')
+        self.assertEqual(response.context['page_obj'].number, 3)
+
+
+class ListBooksStreamingTests(TestCase):
+    def test_streams_rows_in_one_query(self):
+        tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        Book.objects.bulk_create(Book(title=f'Book {i}', author=tolkien) for i in range(5))
+        Book.objects.create(title='Fish & Chips', author=Author.objects.create(name='<Anon>'))
+        response = self.client.get(reverse('list_books'))
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            chunks = list(response.streaming_content)
+        self.assertIn(b'<h1>Books Available:</h1>', chunks[0])
+        self.assertNotIn(b'<li>', chunks[0])
+        content = b''.join(chunks).decode()
+        self.assertEqual(content.count('<li>'), 6)
+        self.assertIn('<li>Book 4 by J.R.R. Tolkien</li>', content)
+        self.assertIn('<li>Fish &amp; Chips by &lt;Anon&gt;</li>', content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
+
+
+class CatalogAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ShelfBook.objects.bulk_create(
+            ShelfBook(title=f'Shelf {i}', author=author, publication_year=year)
+            for i, (author, year) in enumerate([
+                ('Orwell', 1945), ('Orwell', 1949), ('Huxley', 1932), ('Orwell', 1949), ('Bradbury', 1953),
+            ])
+        )
+        le_guin, banks = Author.objects.create(name='Le Guin'), Author.objects.create(name='Banks')
+        books = Book.objects.bulk_create(
+            [Book(title=f'Hainish {i}', author=le_guin) for i in range(3)] + [Book(title='Excession', author=banks)]
+        )
+        cls.central = Library.objects.create(name='Central')
+        cls.central.books.add(*books[:3])
+        cls.branch = Library.objects.create(name='Branch')
+        cls.branch.books.add(books[0], books[3])
+        cls.le_guin, cls.banks = le_guin, banks
+
+    def test_report(self):
+        report = analytics.catalog_report(top_authors=2, chunk_size=2)
+        shelf = report['bookshelf']
+        self.assertEqual(shelf['books'], 5)
+        self.assertEqual(shelf['publication_years']['years'][:2], [1932, 1933])
+        self.assertEqual(len(shelf['publication_years']['years']), 1953 - 1932 + 1)
+        self.assertEqual(dict(zip(*shelf['publication_years'].values()))[1949], 2)
+        self.assertEqual(shelf['books_per_author'], [{'author': 'Orwell', 'books': 3}, {'author': 'Bradbury', 'books': 1}])
+        trend = {row['year']: row for row in shelf['year_over_year']}
+        self.assertEqual(trend[1949], {'year': 1949, 'books': 2, 'change': 2, 'percent': None})
+        self.assertEqual(trend[1950], {'year': 1950, 'books': 0, 'change': -2, 'percent': -100.0})
+
+        catalog = report['relationship_app']
+        self.assertEqual(catalog['books_per_author'], [
+            {'author_id': self.le_guin.pk, 'author': 'Le Guin', 'books': 3},
+            {'author_id': self.banks.pk, 'author': 'Banks', 'books': 1},
+        ])
+        self.assertEqual(catalog['libraries'], [
+            {'library_id': self.central.pk, 'library': 'Central', 'books': 3, 'coverage': 0.75, 'authors': 1},
+            {'library_id': self.branch.pk, 'library': 'Branch', 'books': 2, 'coverage': 0.5, 'authors': 2},
+        ])
+
+    def test_empty_catalog(self):
+        ShelfBook.objects.all().delete()
+        Book.objects.all().delete()
+        report = analytics.catalog_report()
+        self.assertEqual(report['bookshelf']['publication_years'], {'years': [], 'counts': []})
+        self.assertEqual(report['relationship_app']['libraries'], [])
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('catalog_analytics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('staff', password='password123', is_staff=True))
+        response = self.client.get(url, {'top': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['bookshelf']['books_per_author']), 1)
 
-# Create your tests here.
+    def test_management_command(self):
+        out = StringIO()
+        call_command('catalog_stats', '--json', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['relationship_app']['books'], 4)
+        out = StringIO()
+        call_command('catalog_stats', stdout=out)
+        self.assertIn('Central: 3 books (75.0%), 1 authors', out.getvalue())
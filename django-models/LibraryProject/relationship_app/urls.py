@@ -26,6 +26,9 @@ urlpatterns = [
     path('librarian-view/', librarian_view, name='librarian_view'),
     path('member-view/', member_view, name='member_view'),
 
+    # Catalogue statistics (staff only)
+    path('analytics/catalog/', views.catalog_analytics, name='catalog_analytics'),
+
     # Custom permission URLs
       path('add_book/', views.add_book, name='add_book'),
     path('edit_book/', views.edit_book, name='edit_book'),
@@ -1,13 +1,20 @@
 from django.shortcuts import render, redirect
+from django.core.paginator import Paginator
+from django.db.models import F
 from django.views.generic.detail import DetailView
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
 from django.contrib import messages
+from .models import Author
 from .models import Book
 from .models import Library
 from django.contrib.auth.decorators import user_passes_test, login_required
 from django.contrib.auth.decorators import permission_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from .forms import BookForm  # You will need a ModelForm for Book
+from .streaming import render_streaming
+from . import analytics
 
 # ---------------- Add Book ----------------
 @permission_required('relationship_app.can_add_book', raise_exception=True)
@@ -47,15 +54,62 @@ def delete_book(request, pk):
     return render(request, 'relationship_app/book_confirm_delete.html', {'book': book})
 
 # Function-Based View (FBV) for listing books
+# Streamed: rows are fetched as plain values and rendered a chunk at a time
 def list_books(request):
-    books = Book.objects.all()
-    return render(request, 'relationship_app/list_books.html', {'books': books})
+    books = Book.objects.order_by('pk').values('title', author_name=F('author__name'))
+    return render_streaming(request, 'relationship_app/list_books.html',
+                            'relationship_app/list_books_rows.html', books)
 
 # Class-Based View (CBV) for library details
 class LibraryDetailView(DetailView):
+    """
+    A library and one page of its books, with authors joined in. Takes
+    ?author=<id> to filter, ?sort=<key> (see SORTS) and ?page=<n>; the
+    query count stays the same however many books the library holds.
+    """
     model = Library
     template_name = 'relationship_app/library_detail.html'
     context_object_name = 'library'
+    paginate_by = 50
+    SORTS = {
+        'title': ('Title (A-Z)', ('title', 'pk')),
+        '-title': ('Title (Z-A)', ('-title', '-pk')),
+        'author': ('Author', ('author__name', 'title', 'pk')),
+    }
+    default_sort = 'title'
+
+    def get_selected_author(self):
+        try:
+            return int(self.request.GET['author'])
+        except (KeyError, ValueError):
+            return None
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort')
+        return sort if sort in self.SORTS else self.default_sort
+
+    def get_books(self, author, sort):
+        books = self.object.books.select_related('author').order_by(*self.SORTS[sort][1])
+        if author is not None:
+            books = books.filter(author_id=author)
+        return books
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        author, sort = self.get_selected_author(), self.get_sort()
+        page_obj = Paginator(self.get_books(author, sort), self.paginate_by).get_page(self.request.GET.get('page'))
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context.update({
+            'page_obj': page_obj,
+            'books': page_obj.object_list,
+            'authors': Author.objects.filter(books__libraries=self.object).distinct().order_by('name'),
+            'selected_author': author,
+            'sort': sort,
+            'sort_choices': [(key, label) for key, (label, _) in self.SORTS.items()],
+            'query_string': params.urlencode() + '&' if params else '',
+        })
+        return context
 
 # Registration view
 def register(request):
@@ -73,6 +127,7 @@ def register(request):
     return render(request, 'relationship_app/register.html', {'form': form})
 
 # Helper functions to check roles
+# request.user arrives with its profile joined (backends.ProfileModelBackend)
 def is_admin(user):
     return hasattr(user, 'userprofile') and user.userprofile.role == 'Admin'
 
@@ -107,3 +162,12 @@ def member_view(request):
     """
     return render(request, 'relationship_app/member_view.html')
 
+
+# Catalogue statistics as JSON (staff only), see analytics.py
+@staff_member_required
+def catalog_analytics(request):
+    try:
+        top = min(max(int(request.GET.get('top', 10)), 1), 100)
+    except ValueError:
+        top = 10
+    return JsonResponse(analytics.catalog_report(top_authors=top))
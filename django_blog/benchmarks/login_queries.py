@@ -0,0 +1,64 @@
+"""
+Count the queries a login costs, and how many of them touch blog_profile.
+
+Runs against a throwaway test database:
+
+    python benchmarks/login_queries.py [--logins 20]
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_blog.settings')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+def table_of(sql):
+    for keyword in (' FROM ', 'UPDATE ', 'INSERT INTO '):
+        if keyword in sql:
+            return sql.split(keyword, 1)[1].split()[0].strip('"')
+    return sql.split()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        User.objects.create_user(username='bench', password='bench-pass')
+        per_table = Counter()
+        total = 0
+        for _ in range(args.logins):
+            client = Client()
+            with CaptureQueriesContext(connection) as ctx:
+                assert client.login(username='bench', password='bench-pass')
+            total += len(ctx.captured_queries)
+            per_table.update(table_of(q['sql']) for q in ctx.captured_queries)
+
+        print(f"logins:              {args.logins}")
+        print(f"queries per login:   {total / args.logins:.1f}")
+        print(f"blog_profile/login:  {per_table['blog_profile'] / args.logins:.1f}")
+        for table, count in per_table.most_common():
+            print(f"  {table:<24} {count / args.logins:.1f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Compare read throughput of the sync views under WSGI with the async views under ASGI.
+
+Seeds a throwaway SQLite database, starts a local server for each mode in a
+subprocess and drives it with concurrent HTTP clients:
+
+    python benchmarks/wsgi_vs_asgi.py [--posts 200] [--clients 32] [--seconds 10] [--threads 4]
+
+WSGI is served by wsgiref with a fixed pool of ``--threads`` worker threads
+(like gunicorn's gthread worker); ASGI is served by uvicorn, and is skipped if
+uvicorn isn't installed (``pip install uvicorn``).
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+import django
+
+# Configure Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_blog.settings')
+
+from django.conf import settings
+
+SYNC_PATHS = ['/posts/', '/posts/?page=2', '/posts/{pk}/', '/search/?q=post', '/tags/bench/']
+ASYNC_PATHS = ['/async' + path for path in SYNC_PATHS]
+
+
+def use_database(path, debug=True):
+    settings.DATABASES['default']['NAME'] = path
+    if not debug:
+        settings.DEBUG = False
+        settings.ALLOWED_HOSTS = ['127.0.0.1']
+    django.setup()
+
+
+def seed(path, posts):
+    use_database(path)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from blog.models import Comment, Post
+
+    call_command('migrate', verbosity=0)
+    author = User.objects.create(username='bench')
+    readers = [User.objects.create(username=f'reader{i}') for i in range(10)]
+    for i in range(posts):
+        post = Post.objects.create(title=f'Bench post {i}', content='Lorem ipsum ' * 50, author=author)
+        post.tags.add('bench', f'topic{i % 10}')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=reader, content='Nice post') for reader in readers
+        )
+    return Post.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def serve_wsgi(port, threads):
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+    from django.core.wsgi import get_wsgi_application
+
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+        def process_request(self, request, client_address):
+            pool.submit(self.process_request_thread, request, client_address)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = make_server('127.0.0.1', port, get_wsgi_application(),
+                         server_class=PooledWSGIServer, handler_class=QuietHandler)
+    server.request_queue_size = 128
+    server.serve_forever()
+
+
+def serve_asgi(port):
+    import uvicorn
+    from django.core.asgi import get_asgi_application
+
+    uvicorn.run(get_asgi_application(), host='127.0.0.1', port=port, log_level='warning')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def load(port, paths, clients, seconds):
+    urls = cycle(f'http://127.0.0.1:{port}{path}' for path in paths)
+    lock = threading.Lock()
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < deadline:
+            with lock:
+                url = next(urls)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    resp.read()
+            except (urllib.error.URLError, OSError) as exc:
+                errors.append(exc)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    latencies.sort()
+    return latencies, errors
+
+
+def report(label, latencies, errors, seconds):
+    if not latencies:
+        print(f"{label:<6} no successful requests ({len(errors)} errors)")
+        return
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"{label:<6} {len(latencies) / seconds:8.1f} req/s   p50 {p50:7.1f} ms   "
+          f"p95 {p95:7.1f} ms   errors {len(errors)}")
+
+
+def run(mode, args, db_path, first_pk):
+    port = free_port()
+    cmd = [sys.executable, os.path.abspath(__file__), '--serve', mode, '--db', db_path,
+           '--port', str(port), '--threads', str(args.threads)]
+    server = subprocess.Popen(cmd)
+    try:
+        wait_for(port)
+        paths = [path.format(pk=first_pk) for path in (SYNC_PATHS if mode == 'wsgi' else ASYNC_PATHS)]
+        load(port, paths, args.clients, 1)  # warm-up
+        latencies, errors = load(port, paths, args.clients, args.seconds)
+        report(mode.upper(), latencies, errors, args.seconds)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        use_database(args.db, debug=False)
+        if args.serve == 'wsgi':
+            serve_wsgi(args.port, args.threads)
+        else:
+            serve_asgi(args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        first_pk = seed(db_path, args.posts)
+        print(f"posts: {args.posts}  clients: {args.clients}  seconds: {args.seconds}  "
+              f"wsgi threads: {args.threads}")
+        run('wsgi', args, db_path, first_pk)
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            print("ASGI   skipped: uvicorn is not installed")
+        else:
+            run('asgi', args, db_path, first_pk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Async variants of the blog read views, for serving under ASGI
+(django_blog/asgi.py).
+
+They use the async ORM API (aget/acount/aiterator) so a slow client or a long
+search does not hold a worker thread while it waits. Lazy relations can't be
+loaded from async code, so everything the templates touch is fetched up front,
+including the session user.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.http import Http404
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.views import View
+
+from . import cache as list_cache
+from .forms import CommentForm
+from .models import Post, TagStat
+from .search import get_backend
+from .views import SEARCH_RESULTS_PER_PAGE, PostByTagListView, PostDetailView, PostListView
+
+
+async def apaginate(queryset, per_page, number, clamp=False):
+    """
+    Page ``number`` of ``queryset``. A bad number is a 404, or with ``clamp``
+    the first or last page, as ``Paginator.get_page`` does.
+    """
+    paginator = Paginator(queryset, per_page)
+    # Paginator.count is a cached_property; prime it so nothing runs sync.
+    paginator.count = await queryset.acount()
+    try:
+        number = paginator.validate_number(number or 1)
+    except PageNotAnInteger:
+        if not clamp:
+            raise Http404("Invalid page.")
+        number = 1
+    except EmptyPage:
+        if not clamp:
+            raise Http404("Invalid page.")
+        number = paginator.num_pages
+    bottom = (number - 1) * per_page
+    rows = [obj async for obj in queryset[bottom:bottom + per_page].aiterator()]
+    return Page(rows, number, paginator)
+
+
+async def arender(request, template_name, context):
+    # Resolve request.user now; the auth context processor would otherwise
+    # hit the database synchronously while the template renders.
+    request.user = await request.auser()
+    return render(request, template_name, context)
+
+
+class AsyncPostListView(View):
+    """
+    Page-number variant of PostListView (same ``?tag=`` and ``?sort=``),
+    sharing its fragment cache entries.
+    """
+    template_name = PostListView.template_name
+
+    def get_tag(self):
+        return self.request.GET.get('tag', '').lower()
+
+    async def get(self, request, *args, **kwargs):
+        tag = self.get_tag()
+        sort = 'activity' if request.GET.get('sort') == 'activity' else ''
+        number = request.GET.get('page') or 1
+        cache = list_cache.get_cache()
+        key = list_cache.fragment_key(tag=tag, sort=sort, page=number)
+        fragment = await cache.aget(key)
+        if fragment is None:
+            queryset = Post.objects.select_related('author')
+            if tag:
+                queryset = queryset.filter(tags__slug=tag)
+            if sort:
+                queryset = queryset.order_by(*PostListView.activity_ordering)
+            page_obj = await apaginate(queryset, PostListView.paginate_by, number)
+            fragment = render_to_string(PostListView.fragment_template_name, {
+                'posts': page_obj.object_list,
+                'page_obj': page_obj,
+                'paginator': page_obj.paginator,
+                'is_paginated': page_obj.has_other_pages(),
+                'tag': tag,
+                'sort': sort,
+            })
+            await cache.aset(key, fragment, list_cache.get_timeout())
+        context = await self.get_page_context(tag=tag, post_list_fragment=fragment)
+        return await arender(request, self.template_name, context)
+
+    async def get_page_context(self, **kwargs):
+        return {'view': self, **kwargs}
+
+
+class AsyncPostByTagListView(AsyncPostListView):
+    """Async PostByTagListView for ``/async/tags/<slug>/``."""
+    template_name = PostByTagListView.template_name
+
+    def get_tag(self):
+        return self.kwargs['tag_slug'].lower()
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.tag_stat = await TagStat.objects.aget(slug=self.get_tag())
+        except TagStat.DoesNotExist:
+            raise Http404("No such tag.")
+        return await super().get(request, *args, **kwargs)
+
+    async def get_page_context(self, **kwargs):
+        return await super().get_page_context(tag_name=self.tag_stat.name, tag_stat=self.tag_stat, **kwargs)
+
+
+class AsyncPostDetailView(View):
+    async def get(self, request, pk):
+        try:
+            post = await (
+                Post.objects.select_related('author__profile').prefetch_related('tags').aget(pk=pk)
+            )
+        except Post.DoesNotExist:
+            raise Http404("No post found.")
+        comments = post.comments.select_related('author__profile')
+        # A bad ?comments_page= still shows the post, like PostDetailView
+        comments_page = await apaginate(
+            comments, PostDetailView.comments_per_page, request.GET.get('comments_page'), clamp=True
+        )
+        return await arender(request, PostDetailView.template_name, {
+            'post': post,
+            'comment_form': CommentForm(),
+            'comments': comments_page,
+            'comments_page': comments_page,
+        })
+
+
+async def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    number = request.GET.get('page')
+    if query:
+        # The search backends issue raw SQL, so run the page lookup in a thread.
+        paginator = Paginator(get_backend().search(query), SEARCH_RESULTS_PER_PAGE)
+        page_obj = await sync_to_async(paginator.get_page)(number)
+    else:
+        page_obj = await apaginate(Post.objects.select_related('author'), SEARCH_RESULTS_PER_PAGE, number, clamp=True)
+    return await arender(request, 'blog/search_results.html', {'posts': page_obj, 'page_obj': page_obj, 'query': query})
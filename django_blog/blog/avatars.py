@@ -0,0 +1,144 @@
+"""
+Avatar renditions.
+
+Uploaded avatars are never served as-is. After the profile is saved (and the
+transaction commits) the original is resized into square thumbnails, one WebP
+and one JPEG per size in ``BLOG_AVATAR_SIZES``. EXIF, ICC and other metadata
+are dropped, and the files are stored next to the original in the avatar
+storage. The file names are recorded in ``Profile.avatar_renditions``.
+
+The work runs in a small thread pool (``BLOG_AVATAR_WORKERS`` threads),
+standing in for a task queue. With ``BLOG_AVATAR_WORKERS = 0`` it runs
+inline, which is what the tests use.
+"""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+
+from PIL import Image, ImageOps
+
+from .cache import AVATAR_GENERATION_KEY, bump_generation
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_sizes():
+    return tuple(sorted(getattr(settings, 'BLOG_AVATAR_SIZES', (48, 96, 192))))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'BLOG_AVATAR_WORKERS', 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='avatar')
+        return _executor
+
+
+def rendition_name(original, size, fmt):
+    root, _ = os.path.splitext(original)
+    return f'{root}_{size}.{fmt}'
+
+
+def render(image, size, fmt):
+    """Return ``image`` as a ``size`` x ``size`` ``fmt`` thumbnail, without metadata."""
+    format_name, options = FORMATS[fmt]
+    thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    if fmt == 'jpeg' and thumb.mode != 'RGB':
+        background = Image.new('RGB', thumb.size, 'white')
+        background.paste(thumb, mask=thumb.getchannel('A') if 'A' in thumb.getbands() else None)
+        thumb = background
+    # Pillow copies .info (exif, icc_profile, ...) between images and some
+    # encoders write it back out.
+    thumb.info = {}
+    buf = BytesIO()
+    thumb.save(buf, format_name, **options)
+    return buf.getvalue()
+
+
+def open_original(field_file):
+    with field_file.open('rb') as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+    return image
+
+
+def delete_renditions(storage, renditions):
+    for formats in (renditions or {}).values():
+        for name in formats.values():
+            storage.delete(name)
+
+
+def make_renditions(profile_id, stale=None):
+    """
+    Render and store the renditions for ``profile_id``'s current avatar, and
+    delete the ``stale`` renditions of a previous one. Returns the new
+    ``avatar_renditions`` mapping, ``{}`` if there is no usable avatar.
+    """
+    from .models import Profile
+
+    profile = Profile.objects.filter(pk=profile_id).only('avatar').first()
+    if profile is None:
+        return {}
+    storage = profile.avatar.storage
+    delete_renditions(storage, stale)
+    if not profile.avatar:
+        return {}
+    try:
+        image = open_original(profile.avatar)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return {}
+
+    renditions = {}
+    for size in get_sizes():
+        renditions[str(size)] = {}
+        for fmt in FORMATS:
+            name = rendition_name(profile.avatar.name, size, fmt)
+            storage.delete(name)
+            renditions[str(size)][fmt] = storage.save(name, ContentFile(render(image, size, fmt)))
+    # Only record them if the avatar hasn't been replaced in the meantime.
+    updated = Profile.objects.filter(pk=profile_id, avatar=profile.avatar.name).update(avatar_renditions=renditions)
+    if not updated:
+        delete_renditions(storage, renditions)
+        return {}
+    bump_generation(AVATAR_GENERATION_KEY)  # post pages now link the renditions
+    return renditions
+
+
+def _run(profile_id, stale):
+    try:
+        return make_renditions(profile_id, stale)
+    finally:
+        connection.close()
+
+
+def schedule(profile_id, stale=None):
+    """Queue rendition generation for ``profile_id``; returns a Future."""
+    if not getattr(settings, 'BLOG_AVATAR_WORKERS', 2):
+        future = Future()
+        future.set_result(make_renditions(profile_id, stale))
+        return future
+    return get_executor().submit(_run, profile_id, stale)
+
+
+def pick(renditions, size, fmt):
+    """Name of the smallest ``fmt`` rendition at least ``size`` px wide, else the largest."""
+    sizes = sorted(int(s) for s in renditions or {})
+    if not sizes:
+        return None
+    chosen = next((s for s in sizes if s >= size), sizes[-1])
+    return renditions[str(chosen)].get(fmt)
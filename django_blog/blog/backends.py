@@ -0,0 +1,16 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the session user together with their profile,
+    so request.user.profile costs no extra query.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = User._default_manager.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
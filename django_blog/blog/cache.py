@@ -0,0 +1,51 @@
+"""
+Fragment cache for the post list.
+
+Rendered list fragments are stored under keys that embed a generation number.
+Any Post, Comment or tag write bumps the generation (see ``blog.signals``),
+which orphans every stored fragment at once without iterating keys; the old
+entries simply age out of the cache.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+GENERATION_KEY = 'blog:post_list:generation'
+# Post pages show avatars; bumped when one is uploaded or its renditions land.
+AVATAR_GENERATION_KEY = 'blog:avatars:generation'
+
+
+def get_cache():
+    return caches[getattr(settings, 'BLOG_LIST_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'BLOG_LIST_CACHE_TIMEOUT', 300)
+
+
+def get_generation(key=GENERATION_KEY):
+    cache = get_cache()
+    generation = cache.get(key)
+    if generation is None:
+        # The counter lives in the same cache as the fragments, so it can be
+        # evicted while they survive. Restarting at the current time keeps a
+        # fresh generation clear of their keys.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(key=GENERATION_KEY):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_generation(key)
+
+
+def fragment_key(**parts):
+    raw = '&'.join(f'{name}={parts[name]}' for name in sorted(parts))
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'blog:post_list:{get_generation()}:{digest}'
@@ -0,0 +1,73 @@
+"""
+ETag / Last-Modified validators for the blog's read views.
+
+They are used with ``django.views.decorators.http.condition``, which answers
+a matching conditional GET with a 304 before the view (and its template) runs.
+The validators only read a handful of columns: post pages use the post's
+timestamps, comment count, latest comment edit and tag names, plus the
+avatar generation from ``blog.cache`` for the avatars they show; list pages
+use the fragment-cache generation, which every Post, Comment and tag write
+bumps, and cost no query at all.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Max
+
+from . import cache as list_cache
+from .models import Post
+
+
+def _per_request(func):
+    # condition() calls the ETag and Last-Modified functions separately; make
+    # them share one lookup.
+    @wraps(func)
+    def wrapper(request, *args, **kwargs):
+        memo = request.__dict__.setdefault('_blog_validators', {})
+        if func.__name__ not in memo:
+            memo[func.__name__] = func(request, *args, **kwargs)
+        return memo[func.__name__]
+    return wrapper
+
+
+def _digest(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def _viewer(request):
+    # Pages differ for signed-in users (edit links, comment form).
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+@_per_request
+def post_state(request, pk, **kwargs):
+    row = (
+        Post.objects.filter(pk=pk).order_by('pk')
+        .values('published_date', 'updated_at', 'comment_count')
+        .annotate(last_comment_at=Max('comments__updated_at'))
+        .first()
+    )
+    if row is None:
+        return None
+    row['tags'] = sorted(Post(pk=pk).tags.values_list('name', flat=True))
+    return row
+
+
+def post_etag(request, pk, **kwargs):
+    state = post_state(request, pk)
+    if state is None:
+        return None
+    avatars = list_cache.get_generation(list_cache.AVATAR_GENERATION_KEY)
+    return _digest(sorted(state.items()), avatars, request.GET.urlencode(), _viewer(request))
+
+
+def post_last_modified(request, pk, **kwargs):
+    state = post_state(request, pk)
+    if state is None:
+        return None
+    return max(filter(None, (state['published_date'], state['updated_at'], state['last_comment_at'])))
+
+
+def post_list_etag(request, *args, **kwargs):
+    return _digest(list_cache.get_generation(), request.get_full_path(), _viewer(request))
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog.avatars import make_renditions
+from blog.models import Profile
+
+
+def _render(profile_id):
+    try:
+        return bool(make_renditions(profile_id))
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Generate avatar renditions for profiles that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--all', action='store_true', help="Regenerate existing renditions too.")
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(avatar='').exclude(avatar=None)
+        if not options['all']:
+            profiles = profiles.filter(avatar_renditions={})
+        ids = list(profiles.order_by('pk').values_list('pk', flat=True))
+        if options['workers'] > 1:
+            # Each worker thread opens its own connection, closed by _render().
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(_render, ids))
+        else:
+            results = [bool(make_renditions(pk)) for pk in ids]
+        done = sum(results)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered avatars for {done} of {len(ids)} profiles ({len(ids) - done} unreadable)."
+        ))
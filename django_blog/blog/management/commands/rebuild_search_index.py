@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog post full-text search index from scratch."
+
+    def handle(self, *args, **options):
+        indexed = get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts."))
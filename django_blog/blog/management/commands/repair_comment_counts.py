@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comment_count and Post.last_comment_at from the Comment table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = repaired = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'comment_count', 'last_comment_at')[:batch_size]
+            )
+            if not posts:
+                break
+            last_pk = posts[-1].pk
+            # order_by() drops Comment.Meta.ordering, which would break the GROUP BY.
+            stats = {
+                row['post']: (row['total'], row['latest'])
+                for row in Comment.objects.filter(post__in=posts).order_by()
+                .values('post').annotate(total=Count('pk'), latest=Max('created_at'))
+            }
+            changed = []
+            for post in posts:
+                total, latest = stats.get(post.pk, (0, None))
+                if (post.comment_count, post.last_comment_at) != (total, latest):
+                    post.comment_count, post.last_comment_at = total, latest
+                    changed.append(post)
+            with transaction.atomic():
+                Post.objects.bulk_update(changed, ['comment_count', 'last_comment_at'])
+            checked += len(posts)
+            repaired += len(changed)
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts, repaired {repaired}."))
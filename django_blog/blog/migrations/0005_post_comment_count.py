@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_published_idx'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-last_comment_at', '-id'], name='blog_post_activity_idx'),
+        ),
+        # Backfill existing rows; repair_comment_counts does the same in batches.
+        migrations.RunSQL(
+            "UPDATE blog_post SET "
+            "comment_count = (SELECT COUNT(*) FROM blog_comment c WHERE c.post_id = blog_post.id), "
+            "last_comment_at = (SELECT MAX(c.created_at) FROM blog_comment c WHERE c.post_id = blog_post.id)",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(
+            "UPDATE blog_post SET updated_at = published_date",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_updated_at'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='blog_stat', serialize=False, to='taggit.tag')),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-post_count', 'slug'],
+                'indexes': [models.Index(fields=['-post_count', 'slug'], name='blog_tagstat_popular_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            "INSERT INTO blog_tagstat (tag_id, slug, name, post_count, last_used) "
+            "SELECT t.id, LOWER(t.slug), t.name, COUNT(*), MAX(p.published_date) "
+            "FROM taggit_tag t "
+            "JOIN taggit_taggeditem ti ON ti.tag_id = t.id "
+            "JOIN django_content_type ct ON ct.id = ti.content_type_id "
+            "JOIN blog_post p ON p.id = ti.object_id "
+            "WHERE ct.app_label = 'blog' AND ct.model = 'post' "
+            "GROUP BY t.id, t.slug, t.name",
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_tagstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import Count, Max, Min
+from django.db.models.functions import Lower
+
+
+def merge_case_variant_tags(apps, schema_editor):
+    """
+    Fold tags that differ only in case into the oldest one, now that
+    TAGGIT_CASE_INSENSITIVE stops new ones being made, and recount their
+    TagStat rows.
+    """
+    Tag = apps.get_model('taggit', 'Tag')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TagStat = apps.get_model('blog', 'TagStat')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    post_type = ContentType.objects.filter(app_label='blog', model='post').first()
+
+    groups = list(
+        Tag.objects.order_by().annotate(folded=Lower('name')).values('folded')
+        .annotate(keep=Min('pk'), variants=Count('pk')).filter(variants__gt=1)
+    )
+    for group in groups:
+        keep = group['keep']
+        merged = Tag.objects.annotate(folded=Lower('name')).filter(folded=group['folded']).exclude(pk=keep)
+        merged_ids = list(merged.values_list('pk', flat=True))
+        tagged = TaggedItem.objects.filter(tag_id=keep).values_list('content_type_id', 'object_id')
+        already = set(tagged)
+        for item in TaggedItem.objects.filter(tag_id__in=merged_ids).order_by('pk'):
+            key = (item.content_type_id, item.object_id)
+            if key in already:
+                item.delete()
+            else:
+                already.add(key)
+                item.tag_id = keep
+                item.save(update_fields=['tag'])
+        last_used = TagStat.objects.filter(tag_id__in=[keep, *merged_ids]).aggregate(Max('last_used'))
+        Tag.objects.filter(pk__in=merged_ids).delete()  # their TagStat rows go too
+
+        posts = TaggedItem.objects.filter(tag_id=keep, content_type=post_type).count() if post_type else 0
+        if posts:
+            tag = Tag.objects.get(pk=keep)
+            TagStat.objects.update_or_create(tag_id=keep, defaults={
+                'slug': tag.slug.lower(), 'name': tag.name,
+                'post_count': posts, 'last_used': last_used['last_used__max'],
+            })
+        else:
+            TagStat.objects.filter(tag_id=keep).update(post_count=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_profile_avatar_renditions'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_variant_tags, migrations.RunPython.noop),
+    ]
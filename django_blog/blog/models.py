@@ -1,19 +1,32 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
-from django.dispatch import receiver
 from django.urls import reverse
-from django.db.models.signals import post_save
+from django.utils import timezone
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
     tags = TaggableManager() 
+    # Denormalised from Comment so lists need no COUNT/GROUP BY. Kept up to
+    # date by the comment views; `manage.py repair_comment_counts` fixes drift.
+    comment_count = models.PositiveIntegerField(default=0)
+    last_comment_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            # Keyset pagination seeks on (published_date, id), see blog.pagination
+            models.Index(fields=['-published_date', '-id'], name='blog_post_published_idx'),
+            # "Most active" ordering
+            models.Index(fields=['-last_comment_at', '-id'], name='blog_post_activity_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -21,23 +34,61 @@ class Post(models.Model):
     def get_absolute_url(self):
         return reverse('blog:post_detail', args=[str(self.pk)])
 
+    @classmethod
+    def record_comment_added(cls, post_id, created_at):
+        cls.objects.filter(pk=post_id).update(
+            comment_count=F('comment_count') + 1,
+            # Greatest() so a slower concurrent insert can't move it backwards.
+            last_comment_at=Greatest(Coalesce('last_comment_at', Value(created_at)), Value(created_at)),
+        )
+
+    @classmethod
+    def record_comment_removed(cls, post_id):
+        latest = Comment.objects.filter(post=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+        cls.objects.filter(pk=post_id).update(
+            comment_count=Greatest(F('comment_count') - 1, Value(0)),
+            last_comment_at=Subquery(latest),
+        )
+
+    @classmethod
+    def touch(cls, post_id):
+        """
+        Move ``updated_at`` on for changes that leave no newer timestamp of
+        their own (tag changes, deleted comments), so Last-Modified does too.
+        """
+        cls.objects.filter(pk=post_id).update(updated_at=timezone.now())
+
+
+class ProfileManager(models.Manager):
+    def for_user(self, user):
+        """
+        Return ``user``'s profile, creating it if missing. Uses the profile
+        already joined onto the user (see blog.backends) when there is one.
+        """
+        try:
+            return user.profile
+        except Profile.DoesNotExist:
+            profile, _ = self.get_or_create(user=user)
+            return profile
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     bio  = models.TextField(blank=True)
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    # {"<size>": {"webp": <name>, "jpeg": <name>}}, filled in by blog.avatars
+    # after an upload; empty until then.
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
+
+    objects = ProfileManager()
 
     def __str__(self):
         return f"{self.user.username} Profile"
 
-# Auto-create or update profile when user is created/updated
-@receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
-    else:
-        instance.profile.save()
-        
+# Profiles are created lazily by Profile.objects.for_user(). Profile holds
+# nothing copied from User, so User saves (e.g. last_login on every login)
+# never need to write it.
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
@@ -55,4 +106,47 @@ class Comment(models.Model):
         return reverse('blog:comment_update', args=[str(self.pk)])
 
     def get_delete_url(self):
-        return reverse('blog:comment_delete', args=[str(self.pk)])
\ No newline at end of file
+        return reverse('blog:comment_delete', args=[str(self.pk)])
+
+
+class TagStat(models.Model):
+    """
+    Materialised usage of each tag on Post, kept up to date from the tag
+    m2m signals in blog.signals. Serves the tag index and slug lookups
+    without scanning the taggit through table.
+    """
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name="blog_stat")
+    slug = models.SlugField(max_length=100, unique=True)  # lowercased Tag.slug
+    name = models.CharField(max_length=100)
+    post_count = models.PositiveIntegerField(default=0)
+    last_used = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-post_count', 'slug']
+        indexes = [
+            models.Index(fields=['-post_count', 'slug'], name='blog_tagstat_popular_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.post_count})"
+
+    def get_absolute_url(self):
+        return reverse('blog:posts_by_tag', args=[self.slug])
+
+    @classmethod
+    def record_added(cls, tag_ids):
+        if not tag_ids:
+            return
+        tags = Tag.objects.filter(pk__in=tag_ids).only('pk', 'name', 'slug')
+        cls.objects.bulk_create(
+            [cls(tag=tag, slug=tag.slug.lower(), name=tag.name) for tag in tags],
+            ignore_conflicts=True,
+        )
+        cls.objects.filter(tag_id__in=tag_ids).update(
+            post_count=F('post_count') + 1, last_used=timezone.now(),
+        )
+
+    @classmethod
+    def record_removed(cls, tag_ids):
+        if tag_ids:
+            cls.objects.filter(tag_id__in=tag_ids).update(post_count=Greatest(F('post_count') - 1, Value(0)))
@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination.
+
+A page is fetched with a range query on the ordering columns instead of an
+OFFSET, so deep pages cost the same as the first one and rows inserted while
+a reader is paging neither shift nor repeat results. The cursor is an opaque
+token holding the ordering values of the last row served.
+"""
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _json_default(value):
+    # Full isoformat(): DjangoJSONEncoder drops microseconds, and the cursor
+    # has to compare equal to the stored value.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not cursor-serialisable')
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the "comes after" condition for ``ordering``, e.g. for
+    ``('-published_date', '-pk')``:
+    ``published_date < v0 OR (published_date = v0 AND pk < v1)``.
+    """
+    clauses = []
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {ordering[j].lstrip('-'): values[j] for j in range(i)}
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+    return reduce(or_, clauses)
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.count = count
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    ``ordering`` must end with a unique column (normally ``pk``) so every row
+    has a distinct position.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pk',)):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def page(self, cursor=None, with_count=False):
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            values = decode_cursor(cursor, len(self.ordering))
+            try:
+                queryset = queryset.filter(keyset_filter(self.ordering, values))
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor(cursor)
+        # One extra row tells us whether there is a next page without a COUNT.
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = encode_cursor([
+                getattr(rows[-1], field.lstrip('-')) for field in self.ordering
+            ])
+        count = self.queryset.count() if with_count else None
+        return KeysetPage(rows, next_cursor, count)
@@ -0,0 +1,182 @@
+"""
+Full-text search for blog posts.
+
+Posts are mirrored into a search index that the receivers in ``blog.signals``
+keep in sync with Post saves/deletes and tag changes. The backend is picked
+with the ``BLOG_SEARCH_BACKEND`` setting so a deployment that is not on
+SQLite can plug in its own implementation.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+DEFAULT_SEARCH_BACKEND = 'blog.search.SQLiteFTS5Backend'
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def get_backend():
+    return import_string(getattr(settings, 'BLOG_SEARCH_BACKEND', DEFAULT_SEARCH_BACKEND))()
+
+
+class SearchResults:
+    """
+    Lazy result set for a query.
+
+    Only ``count()`` and slicing are implemented, which is all ``Paginator``
+    needs, so a page of results is fetched with LIMIT/OFFSET instead of
+    materialising every match.
+    """
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        if stop <= start:
+            return []
+        ids = self.backend.ranked_ids(self.query, start, stop - start)
+        posts = Post.objects.select_related('author').in_bulk(ids)
+        # in_bulk() returns a dict, so put the rows back in rank order.
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class BaseSearchBackend:
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Re-index every post and return how many were indexed."""
+        raise NotImplementedError
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def ranked_ids(self, query, offset, limit):
+        raise NotImplementedError
+
+    def search(self, query):
+        return SearchResults(self, query)
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """
+    Unindexed fallback for databases without FTS5. Matches the old
+    ``icontains`` behaviour and ranks by recency.
+    """
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        return Post.objects.count()
+
+    def _matches(self, query):
+        return Post.objects.filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(tags__name__icontains=query)
+        ).distinct()
+
+    def count(self, query):
+        return self._matches(query).count()
+
+    def ranked_ids(self, query, offset, limit):
+        ids = self._matches(query).order_by('-published_date', '-pk').values_list('pk', flat=True)
+        return list(ids[offset:offset + limit])
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Backed by the ``blog_post_fts`` FTS5 virtual table (see migration 0003),
+    whose rowid is the Post primary key. Results are ranked with bm25 and
+    every query term is prefix-matched.
+    """
+    table = 'blog_post_fts'
+    # bm25 weights for the title, content and tags columns.
+    weights = (10.0, 1.0, 5.0)
+
+    def match_expression(self, query):
+        # Quote each token so FTS5 operators in user input are taken literally.
+        return ' '.join('"%s"*' % token for token in TOKEN_RE.findall(query.lower()))
+
+    def _row(self, post, tags):
+        return [post.pk, post.title, post.content, ' '.join(sorted(tags))]
+
+    def index_post(self, post):
+        row = self._row(post, post.tags.names())
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)', row
+            )
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def rebuild(self, batch_size=500):
+        total = 0
+        posts = Post.objects.order_by('pk').prefetch_related('tags').iterator(chunk_size=batch_size)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            batch = []
+            for post in posts:
+                batch.append(self._row(post, [tag.name for tag in post.tags.all()]))
+                if len(batch) == batch_size:
+                    total += self._insert_many(cursor, batch)
+                    batch = []
+            total += self._insert_many(cursor, batch)
+        return total
+
+    def _insert_many(self, cursor, rows):
+        if rows:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)', rows
+            )
+        return len(rows)
+
+    def count(self, query):
+        expression = self.match_expression(query)
+        if not expression:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table} WHERE {self.table} MATCH %s', [expression])
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, query, offset, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, {weights}), rowid DESC LIMIT %s OFFSET %s',
+                [expression, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
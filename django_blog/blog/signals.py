@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import avatars
+from .cache import AVATAR_GENERATION_KEY, bump_generation
+from .models import Comment, Post, Profile, TagStat
+from .search import get_backend
+
+
+# Keep the search index in step with Post writes
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove_post(instance.pk)
+
+
+# Tags are saved after the post itself (form.save_m2m), so re-index on change
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_tags(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        get_backend().index_post(instance)
+
+
+# Any write that can change a rendered post list orphans the cached fragments.
+# Only once it commits, though: a list rendered from the old rows in the
+# meantime would otherwise be stored under the new generation.
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_post_list(sender, **kwargs):
+    transaction.on_commit(bump_generation)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_list_tags(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        transaction.on_commit(bump_generation)
+
+
+# Post pages send Last-Modified from the post's and its comments' timestamps
+# (blog.conditional). A deleted comment or a tag change has none, so move the
+# post's on instead.
+@receiver(post_delete, sender=Comment)
+def touch_post_on_comment_delete(sender, instance, **kwargs):
+    Post.touch(instance.post_id)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_post_on_tag_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        Post.touch(instance.pk)
+
+
+# Tag usage counts (TagStat). taggit only sends pk_set for add/remove, so
+# remember the tags a post had before a clear or delete.
+@receiver(m2m_changed, sender=Post.tags.through)
+def update_tag_stats(sender, instance, action, pk_set=None, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        TagStat.record_removed(instance.__dict__.pop('_cleared_tag_ids', []))
+    elif action == 'post_add':
+        TagStat.record_added(pk_set)
+    elif action == 'post_remove':
+        TagStat.record_removed(pk_set)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    instance._deleted_tag_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_post_tags(sender, instance, **kwargs):
+    TagStat.record_removed(instance.__dict__.pop('_deleted_tag_ids', []))
+
+
+# Avatar renditions (blog.avatars). Remember the stored avatar name so a save
+# that doesn't touch the avatar doesn't re-render it.
+def _avatar_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Profile)
+def remember_avatar(sender, instance, **kwargs):
+    instance._saved_avatar = _avatar_name(instance.__dict__.get('avatar'))
+
+
+@receiver(pre_save, sender=Profile)
+def reset_avatar_renditions(sender, instance, raw=False, **kwargs):
+    if raw or 'avatar' not in instance.__dict__:  # deferred, so not being saved
+        return
+    if _avatar_name(instance.avatar) == getattr(instance, '_saved_avatar', ''):
+        return
+    # Templates fall back to the original until the new renditions exist.
+    instance._stale_renditions = instance.avatar_renditions
+    instance.avatar_renditions = {}
+
+
+@receiver(post_save, sender=Profile)
+def queue_avatar_renditions(sender, instance, raw=False, **kwargs):
+    if raw or '_stale_renditions' not in instance.__dict__:
+        return
+    stale = instance.__dict__.pop('_stale_renditions')
+    instance._saved_avatar = _avatar_name(instance.avatar)
+    transaction.on_commit(lambda: bump_generation(AVATAR_GENERATION_KEY))  # post pages show the new original
+    transaction.on_commit(lambda: avatars.schedule(instance.pk, stale))
@@ -0,0 +1,50 @@
+"""
+Avatar template tags. Load with ``{% load blog_avatars %}``::
+
+    {% avatar comment.author.profile 48 %}
+    <img src="{% avatar_url profile 96 %}">
+
+Both serve the smallest rendition at least ``size`` px wide (2x for
+high-DPI screens with ``avatar``). They fall back to the original upload
+while the renditions are still being generated.
+"""
+from django import template
+from django.utils.html import format_html
+
+from ..avatars import pick
+
+register = template.Library()
+
+
+def _url(profile, size, fmt):
+    if not profile or not profile.avatar:
+        return ''
+    name = pick(profile.avatar_renditions, size, fmt)
+    if name is None:
+        return profile.avatar.url
+    return profile.avatar.storage.url(name)
+
+
+@register.simple_tag
+def avatar_url(profile, size=96, fmt='jpeg'):
+    return _url(profile, int(size), fmt)
+
+
+@register.simple_tag
+def avatar(profile, size=48, alt=''):
+    """``<picture>`` with a WebP source and a JPEG fallback."""
+    size = int(size)
+    if not profile or not profile.avatar:
+        return ''
+    if not profile.avatar_renditions:
+        return format_html(
+            '<img src="{}" width="{}" height="{}" alt="{}" loading="lazy">',
+            profile.avatar.url, size, size, alt,
+        )
+    return format_html(
+        '<picture><source type="image/webp" srcset="{} 1x, {} 2x">'
+        '<img src="{}" srcset="{} 2x" width="{}" height="{}" alt="{}" loading="lazy"></picture>',
+        _url(profile, size, 'webp'), _url(profile, size * 2, 'webp'),
+        _url(profile, size, 'jpeg'), _url(profile, size * 2, 'jpeg'),
+        size, size, alt,
+    )
@@ -1,7 +1,23 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import parse_http_date
 from django.contrib.auth.models import User
-from .models import Post
+from .models import Comment, Post, Profile, TagStat
+from .search import get_backend
+from .views import PostDetailView
 
 class PostPermissionTests(TestCase):
     def setUp(self):
@@ -17,4 +33,528 @@ class PostPermissionTests(TestCase):
         self.client.login(username='u2', password='pass')
         resp = self.client.get(reverse('blog:post_update', args=[self.post.pk]))
         # logged-in non-author should be redirected or get 403 depending on setup
-        self.assertNotEqual(resp.status_code, 200)
\ No newline at end of file
+        self.assertNotEqual(resp.status_code, 200)
+
+class PostSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.django_post = Post.objects.create(
+            title='Django performance', content='Indexes and caching', author=self.user
+        )
+        self.other_post = Post.objects.create(
+            title='Gardening', content='Notes about django reinhardt records', author=self.user
+        )
+        self.other_post.tags.add('music')
+
+    def search(self, query):
+        return list(get_backend().search(query)[0:10])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search('django'), [self.django_post, self.other_post])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.search('perf'), [self.django_post])
+
+    def test_tag_changes_are_indexed(self):
+        self.assertEqual(self.search('musi'), [self.other_post])
+        self.other_post.tags.clear()
+        self.assertEqual(self.search('music'), [])
+
+    def test_edits_and_deletes_are_indexed(self):
+        self.django_post.title = 'Flask performance'
+        self.django_post.save()
+        self.assertEqual(self.search('flask'), [self.django_post])
+        self.django_post.delete()
+        self.assertEqual(self.search('performance'), [])
+
+    def test_operators_in_query_are_literal(self):
+        # Both tokens are required, and the stray quote must not break MATCH.
+        self.assertEqual(self.search('django OR "'), [])
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM blog_post_fts')
+        self.assertEqual(get_backend().rebuild(), 2)
+        self.assertEqual(self.search('music'), [self.other_post])
+
+    def test_results_are_paginated(self):
+        for i in range(12):
+            Post.objects.create(title=f'Paging {i}', content='C', author=self.user)
+        resp = self.client.get(reverse('blog:search_posts'), {'q': 'paging', 'page': 2})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['page_obj'].paginator.count, 12)
+        self.assertEqual(len(resp.context['page_obj']), 2)
+
+
+class PostListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.post = Post.objects.create(title='First', content='C', author=self.user)
+        self.post.tags.add('django')
+
+    def get_fragment(self, **params):
+        resp = self.client.get(reverse('blog:post_list'), params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.context['post_list_fragment']
+
+    def check_cache_hit_and_invalidation(self):
+        self.assertIn('First', self.get_fragment())
+        with self.assertNumQueries(0):
+            self.get_fragment()
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Second', content='C', author=self.user)
+        self.assertIn('Second', self.get_fragment())
+
+    def test_locmem_cache(self):
+        self.check_cache_hit_and_invalidation()
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                self.check_cache_hit_and_invalidation()
+
+    def test_tag_filter_is_keyed_separately(self):
+        other = Post.objects.create(title='Untagged', content='C', author=self.user)
+        self.assertIn(other.title, self.get_fragment())
+        self.assertNotIn(other.title, self.get_fragment(tag='django'))
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.add('django')
+        self.assertIn(other.title, self.get_fragment(tag='django'))
+
+    def test_comment_write_invalidates(self):
+        self.get_fragment()
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author=self.user, content='Hi')
+            # Not committed yet, so the stored fragment still stands
+            with self.assertNumQueries(0):
+                self.get_fragment()
+        with self.assertNumQueries(2):
+            self.get_fragment()
+
+
+class PostListCursorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        for i in range(25):
+            Post.objects.create(title=f'Post {i}', content='C', author=self.user)
+
+    def get_page(self, **params):
+        resp = self.client.get(reverse('blog:post_list'), params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.context['view'].get_keyset_page()
+
+    def test_pages_follow_cursor_without_count(self):
+        seen = []
+        cursor = ''
+        while True:
+            page = self.get_page(cursor=cursor)
+            self.assertIsNone(page.count)
+            seen.extend(post.pk for post in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        expected = list(Post.objects.order_by('-published_date', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_stable_under_concurrent_inserts(self):
+        first = self.get_page(cursor='')
+        Post.objects.create(title='Newest', content='C', author=self.user)
+        second = self.get_page(cursor=first.next_cursor)
+        self.assertFalse({p.pk for p in first} & {p.pk for p in second})
+        self.assertNotIn('Newest', [p.title for p in second])
+
+    def test_optional_count(self):
+        self.assertEqual(self.get_page(cursor='', count='1').count, 25)
+
+    def test_invalid_cursor_is_404(self):
+        resp = self.client.get(reverse('blog:post_list'), {'cursor': 'bogus'})
+        self.assertEqual(resp.status_code, 404)
+
+
+class CommentCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.post = Post.objects.create(title='T', content='C', author=self.user)
+        self.client.login(username='writer', password='pass')
+
+    def add_comment(self, text):
+        resp = self.client.post(reverse('blog:comment_create', args=[self.post.pk]), {'content': text})
+        self.assertEqual(resp.status_code, 302)
+        return Comment.objects.latest('pk')
+
+    def test_create_and_delete_keep_counters_in_step(self):
+        first = self.add_comment('one')
+        second = self.add_comment('two')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_comment_at, second.created_at)
+
+        self.client.post(reverse('blog:comment_delete', args=[second.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, first.created_at)
+
+        self.client.post(reverse('blog:comment_delete', args=[first.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.comment_count, self.post.last_comment_at), (0, None))
+
+    def test_repair_command(self):
+        comment = Comment.objects.create(post=self.post, author=self.user, content='direct')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        call_command('repair_comment_counts', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, comment.created_at)
+
+    def test_activity_sort_uses_counters(self):
+        quiet = Post.objects.create(title='Quiet', content='C', author=self.user)
+        self.add_comment('bump')
+        resp = self.client.get(reverse('blog:post_list'), {'sort': 'activity'})
+        fragment = resp.context['post_list_fragment']
+        self.assertLess(fragment.index(self.post.get_absolute_url()), fragment.index(quiet.get_absolute_url()))
+        self.assertIn('1 comment', fragment)
+
+
+class ProfileQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='pass')
+
+    def test_login_does_not_touch_profile(self):
+        Profile.objects.for_user(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(self.client.login(username='reader', password='pass'))
+        self.assertFalse([q for q in ctx.captured_queries if 'blog_profile' in q['sql']])
+
+    def test_profile_created_lazily(self):
+        self.assertFalse(Profile.objects.filter(user=self.user).exists())
+        self.client.login(username='reader', password='pass')
+        self.assertEqual(self.client.get(reverse('blog:profile')).status_code, 200)
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_profile_view_joins_profile_onto_user(self):
+        Profile.objects.for_user(self.user)
+        self.client.login(username='reader', password='pass')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('blog:profile'))
+        profile_queries = [q['sql'] for q in ctx.captured_queries if 'blog_profile' in q['sql']]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertIn('auth_user', profile_queries[0])
+
+
+class PostDetailQueryTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass')
+        Profile.objects.for_user(self.author)
+        self.post = Post.objects.create(title='T', content='C', author=self.author)
+
+    def add_comments(self, n):
+        for i in range(n):
+            commenter = User.objects.create_user(username=f'c{Comment.objects.count()}')
+            Profile.objects.for_user(commenter)
+            Comment.objects.create(post=self.post, author=commenter, content=f'comment {i}')
+
+    def render_context(self, **params):
+        request = RequestFactory().get(self.post.get_absolute_url(), params)
+        request.user = AnonymousUser()
+        ctx = PostDetailView.as_view()(request, pk=self.post.pk).context_data
+        post = ctx['post']
+        # Touch everything the template shows.
+        [tag.name for tag in post.tags.all()]
+        post.author.profile.avatar
+        return [(c.author.username, c.author.profile.avatar) for c in ctx['comments']]
+
+    def test_query_count_is_constant(self):
+        # 2 for the ETag/Last-Modified validators, 4 for the page itself.
+        self.add_comments(1)
+        self.post.tags.add('a')
+        with self.assertNumQueries(6):
+            self.render_context()
+
+        self.add_comments(20)
+        self.post.tags.add('b', 'c', 'd')
+        with self.assertNumQueries(6):
+            self.render_context()
+
+    def test_comments_are_paginated(self):
+        self.add_comments(PostDetailView.comments_per_page + 5)
+        self.assertEqual(len(self.render_context()), PostDetailView.comments_per_page)
+        self.assertEqual(len(self.render_context(comments_page=2)), 5)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.post = Post.objects.create(title='T', content='C', author=self.user)
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def test_post_detail_not_modified_skips_rendering(self):
+        url = self.post.get_absolute_url()
+        first = self.client.get(url)
+        self.assertIn('Last-Modified', first)
+        with self.assertTemplateNotUsed('blog/post_detail.html'):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_post_detail_changes_invalidate(self):
+        url = self.post.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+        etag = self.client.get(url)['ETag']
+        comment.content = 'Edited'
+        comment.save()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+        etag = self.client.get(url)['ETag']
+        self.post.tags.add('new')
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+        etag = self.client.get(url)['ETag']
+        self.post.title = 'Edited'
+        self.post.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def last_modified(self):
+        return parse_http_date(self.client.get(self.post.get_absolute_url())['Last-Modified'])
+
+    def backdate(self, days):
+        then = timezone.now() - timedelta(days=days)
+        Post.objects.filter(pk=self.post.pk).update(published_date=then, updated_at=then)
+        return then
+
+    def test_last_modified_moves_on_for_deletes_and_tags(self):
+        self.backdate(2)
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Hi')
+        Comment.objects.filter(pk=comment.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        before = self.last_modified()
+        comment.delete()
+        self.assertGreater(self.last_modified(), before)
+
+        before = self.backdate(2).timestamp()
+        self.post.tags.add('new')
+        self.assertGreater(self.last_modified(), before)
+        before = self.backdate(2).timestamp()
+        self.post.tags.remove('new')
+        self.assertGreater(self.last_modified(), before)
+
+    def test_post_list_revalidates_until_a_write(self):
+        url = reverse('blog:post_list')
+        self.assertEqual(self.revalidate(url).status_code, 304)
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Another', content='C', author=self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_differs_per_viewer(self):
+        url = self.post.get_absolute_url()
+        anonymous = self.client.get(url)['ETag']
+        self.client.login(username='writer', password='pass')
+        self.assertNotEqual(self.client.get(url)['ETag'], anonymous)
+
+
+class TagStatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.first = Post.objects.create(title='First', content='C', author=self.user)
+        self.second = Post.objects.create(title='Second', content='C', author=self.user)
+
+    def counts(self):
+        return dict(TagStat.objects.values_list('slug', 'post_count'))
+
+    def test_counts_follow_tag_changes(self):
+        self.first.tags.add('Django', 'python')
+        self.second.tags.add('django')
+        self.assertEqual(self.counts(), {'django': 2, 'python': 1})
+
+        self.first.tags.set(['python'])
+        self.assertEqual(self.counts()['django'], 1)
+        self.second.tags.clear()
+        self.assertEqual(self.counts()['django'], 0)
+        self.first.delete()
+        self.assertEqual(self.counts()['python'], 0)
+
+    def test_tag_pages_ignore_case(self):
+        self.first.tags.add('Django')
+        self.second.tags.add('django')
+        for resp in (self.client.get(reverse('blog:posts_by_tag', args=['django'])),
+                     self.client.get(reverse('blog:post_list'), {'tag': 'DJANGO'})):
+            self.assertIn('First', resp.context['post_list_fragment'])
+            self.assertIn('Second', resp.context['post_list_fragment'])
+
+    def test_tag_index_and_tag_page(self):
+        self.first.tags.add('python')
+        self.second.tags.add('python')
+        resp = self.client.get(reverse('blog:tag_index'))
+        self.assertEqual([t.slug for t in resp.context['tags']], ['python'])
+
+        resp = self.client.get(reverse('blog:posts_by_tag', args=['Python']))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['tag_name'], 'python')
+        self.assertIn('Second', resp.context['post_list_fragment'])
+
+    def test_unknown_tag_is_404(self):
+        resp = self.client.get(reverse('blog:posts_by_tag', args=['missing']))
+        self.assertEqual(resp.status_code, 404)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer', password='pass')
+        self.post = Post.objects.create(title='Async post', content='Served by ASGI', author=self.user)
+        self.post.tags.add('python')
+        Comment.objects.create(post=self.post, author=self.user, content='First!')
+
+    async def test_post_list_shares_fragment_cache(self):
+        resp = await self.async_client.get(reverse('blog:async_post_list'), {'tag': 'python'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('Async post', resp.context['post_list_fragment'])
+        sync_resp = await sync_to_async(self.client.get)(reverse('blog:post_list'), {'tag': 'python'})
+        self.assertEqual(sync_resp.context['post_list_fragment'], resp.context['post_list_fragment'])
+        resp = await self.async_client.get(reverse('blog:async_post_list'), {'page': 99})
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_post_detail(self):
+        resp = await self.async_client.get(reverse('blog:async_post_detail', args=[self.post.pk]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'python')
+        self.assertContains(resp, 'First!')
+        resp = await self.async_client.get(reverse('blog:async_post_detail', args=[self.post.pk + 1]))
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_post_detail_clamps_comments_page(self):
+        await Comment.objects.abulk_create(
+            Comment(post=self.post, author=self.user, content=f'Reply {i}')
+            for i in range(PostDetailView.comments_per_page)
+        )
+        url = reverse('blog:async_post_detail', args=[self.post.pk])
+        # Same pages as Paginator.get_page gives the sync view
+        for number, expected in (('abc', 1), ('', 1), ('0', 2), ('99', 2)):
+            resp = await self.async_client.get(url, {'comments_page': number})
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.context['comments_page'].number, expected)
+
+    async def test_search(self):
+        resp = await self.async_client.get(reverse('blog:async_search_posts'), {'q': 'asgi'})
+        self.assertEqual([p.title for p in resp.context['posts']], ['Async post'])
+        resp = await self.async_client.get(reverse('blog:async_search_posts'))
+        self.assertEqual(resp.context['page_obj'].paginator.count, 1)
+
+    async def test_posts_by_tag(self):
+        resp = await self.async_client.get(reverse('blog:async_posts_by_tag', args=['Python']))
+        self.assertEqual(resp.context['tag_name'], 'python')
+        self.assertIn('Async post', resp.context['post_list_fragment'])
+        resp = await self.async_client.get(reverse('blog:async_posts_by_tag', args=['missing']))
+        self.assertEqual(resp.status_code, 404)
+
+
+def make_jpeg(size=(640, 480), color='red'):
+    from PIL import Image
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    exif[0x010F] = 'Camera Maker'
+    buf = BytesIO()
+    Image.new('RGB', size, color).save(buf, 'JPEG', exif=exif)
+    return buf.getvalue()
+
+
+@override_settings(BLOG_AVATAR_WORKERS=0, BLOG_AVATAR_SIZES=(48, 96))
+class AvatarRenditionTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=self.media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.user = User.objects.create_user(username='writer')
+        self.profile = Profile.objects.for_user(self.user)
+
+    def upload(self, name='me.jpg', **kwargs):
+        self.profile.avatar = SimpleUploadedFile(name, make_jpeg(**kwargs), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        self.profile.refresh_from_db()
+        return self.profile.avatar_renditions
+
+    def test_renditions_are_square_and_stripped(self):
+        from PIL import Image
+        renditions = self.upload()
+        self.assertEqual(set(renditions), {'48', '96'})
+        storage = self.profile.avatar.storage
+        for size, formats in renditions.items():
+            self.assertEqual(set(formats), {'webp', 'jpeg'})
+            for fmt, name in formats.items():
+                self.assertTrue(name.startswith('avatars/me_'))
+                with storage.open(name) as f, Image.open(f) as img:
+                    self.assertEqual(img.size, (int(size), int(size)))
+                    self.assertEqual(img.format, fmt.upper())
+                    self.assertFalse(img.getexif())
+                    self.assertNotIn('icc_profile', img.info)
+
+    def test_unrelated_saves_do_not_rerender(self):
+        self.upload()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.profile.bio = 'Hello'
+            self.profile.save()
+        self.assertEqual(callbacks, [])
+
+    def test_replacing_avatar_removes_old_renditions(self):
+        old = self.upload()
+        new = self.upload(name='new.jpg', color='blue')
+        storage = self.profile.avatar.storage
+        self.assertTrue(all(storage.exists(n) for f in new.values() for n in f.values()))
+        self.assertFalse(any(storage.exists(n) for f in old.values() for n in f.values()))
+
+    def test_template_tags(self):
+        from django.template import Context, Template
+        template = Template('{% load blog_avatars %}{% avatar profile 48 %}|{% avatar_url profile 60 "webp" %}')
+        self.profile.avatar = SimpleUploadedFile('me.jpg', make_jpeg(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks():
+            self.profile.save()
+        # Not rendered yet: the original is served.
+        html = template.render(Context({'profile': self.profile}))
+        self.assertIn(self.profile.avatar.url, html)
+
+        self.upload()
+        html = template.render(Context({'profile': self.profile}))
+        self.assertIn('<picture>', html)
+        self.assertIn('_96.webp 2x', html)
+        self.assertTrue(html.endswith('_96.webp'))
+
+    def test_post_page_shows_author_and_commenter_avatars(self):
+        self.upload()
+        post = Post.objects.create(title='T', content='C', author=self.user)
+        Comment.objects.create(post=post, author=self.user, content='Hi')
+        html = self.client.get(post.get_absolute_url()).content.decode()
+        self.assertEqual(html.count('<picture>'), 2)
+        self.assertIn(self.profile.avatar_renditions['48']['webp'], html)
+
+        # A new avatar changes the page's ETag, so caches don't keep the old one
+        etag = self.client.get(post.get_absolute_url())['ETag']
+        self.upload(name='new.jpg', color='blue')
+        response = self.client.get(post.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.profile.avatar_renditions['48']['webp'], response.content.decode())
+
+    def test_backfill_command(self):
+        self.upload()
+        Profile.objects.update(avatar_renditions={})
+        out = StringIO()
+        call_command('backfill_avatar_renditions', workers=1, stdout=out)
+        self.assertIn('Rendered avatars for 1 of 1 profiles', out.getvalue())
+        self.profile.refresh_from_db()
+        self.assertEqual(set(self.profile.avatar_renditions), {'48', '96'})
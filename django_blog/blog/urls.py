@@ -1,6 +1,6 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import async_views, views
 from .views import (
     PostListView,
     PostDetailView,
@@ -10,7 +10,7 @@ from .views import (
     CommentCreateView,
     CommentUpdateView,
     CommentDeleteView,
-    PostByTagListView,  # <- add this
+    PostByTagListView,
 )
 
 app_name = "blog"
@@ -26,6 +26,7 @@ urlpatterns = [
     path('search/', views.search_posts, name='search_posts'),
 
     # Tags
+    path('tags/', views.tag_index, name='tag_index'),
     path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='posts_by_tag'),
 
     # Blog posts CRUD (posts/ style)
@@ -45,4 +46,10 @@ urlpatterns = [
     path("post/<int:pk>/comments/new/", CommentCreateView.as_view(), name="comment_create"),
     path("comment/<int:pk>/update/", CommentUpdateView.as_view(), name="comment_update"),
     path("comment/<int:pk>/delete/", CommentDeleteView.as_view(), name="comment_delete"),
+
+    # Async read views (serve through django_blog.asgi)
+    path("async/posts/", async_views.AsyncPostListView.as_view(), name="async_post_list"),
+    path("async/posts/<int:pk>/", async_views.AsyncPostDetailView.as_view(), name="async_post_detail"),
+    path("async/search/", async_views.search_posts, name="async_search_posts"),
+    path("async/tags/<slug:tag_slug>/", async_views.AsyncPostByTagListView.as_view(), name="async_posts_by_tag"),
 ]
\ No newline at end of file
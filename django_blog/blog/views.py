@@ -3,28 +3,157 @@ from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
-from .models import Post, Comment
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from .models import Post, Comment, Profile, TagStat
 from .forms import PostForm, CommentForm
-from django.db.models import Q
+from .search import get_backend
+from .pagination import InvalidCursor, KeysetPaginator
+from . import cache as list_cache
+from .conditional import post_etag, post_last_modified, post_list_etag
 
+@method_decorator(condition(etag_func=post_list_etag), name='dispatch')
 class PostListView(ListView):
+    """
+    Paginated post list, optionally filtered with ``?tag=<slug>``.
+
+    The list itself is rendered into ``blog/_post_list.html`` and cached per
+    page/tag, so a cache hit skips both the COUNT and the page query. The page
+    template receives the rendered HTML as ``post_list_fragment``.
+
+    Passing ``?cursor=`` switches to keyset pagination over
+    ``(published_date, pk)``; the total count is then only computed when
+    ``?count=1`` is also given.
+
+    ``?sort=activity`` orders by the most recent comment using the
+    denormalised ``Post.last_comment_at`` (page-number pagination only).
+    """
     model = Post
     template_name = 'blog/post_list.html'   # blog/templates/blog/post_list.html
+    fragment_template_name = 'blog/_post_list.html'
     context_object_name = 'posts'
     paginate_by = 10
+    cursor_kwarg = 'cursor'
+    keyset_ordering = ('-published_date', '-pk')
+    activity_ordering = ('-last_comment_at', '-id')
+
+    def get_tag(self):
+        return self.request.GET.get('tag', '').lower()
+
+    def get_sort(self):
+        return 'activity' if self.request.GET.get('sort') == 'activity' else ''
+
+    def get_cursor(self):
+        # last_comment_at is nullable, so it can't be a keyset column.
+        if self.get_sort():
+            return None
+        return self.request.GET.get(self.cursor_kwarg)
+
+    def wants_count(self):
+        return self.request.GET.get('count') == '1'
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('author')
+        tag = self.get_tag()
+        if tag:
+            # Seeks the unique taggit_tag.slug index, then the tag_id index.
+            queryset = queryset.filter(tags__slug=tag)
+        if self.get_sort():
+            queryset = queryset.order_by(*self.activity_ordering)
+        return queryset
+
+    def get_paginate_by(self, queryset):
+        if self.get_cursor() is not None:
+            return None
+        return super().get_paginate_by(queryset)
+
+    def get_keyset_page(self):
+        paginator = KeysetPaginator(self.object_list, self.paginate_by, self.keyset_ordering)
+        try:
+            return paginator.page(self.get_cursor(), with_count=self.wants_count())
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+
+    def get_context_data(self, **kwargs):
+        if self.get_cursor() is not None:
+            cursor_page = self.get_keyset_page()
+            kwargs.update(object_list=cursor_page.object_list, cursor_page=cursor_page)
+        ctx = super().get_context_data(**kwargs)
+        ctx['tag'] = self.get_tag()
+        ctx['sort'] = self.get_sort()
+        return ctx
+
+    def get_fragment_key_parts(self):
+        parts = {'tag': self.get_tag(), 'sort': self.get_sort()}
+        if self.get_cursor() is not None:
+            parts.update(cursor=self.get_cursor(), count=self.wants_count())
+        else:
+            parts['page'] = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        return parts
 
+    def render_fragment(self):
+        # Rendered without the request so nothing user-specific ends up cached.
+        return render_to_string(self.fragment_template_name, self.get_context_data())
+
+    def get(self, request, *args, **kwargs):
+        # Lazy: only evaluated when the fragment has to be rendered.
+        self.object_list = self.get_queryset()
+        cache = list_cache.get_cache()
+        key = list_cache.fragment_key(**self.get_fragment_key_parts())
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = self.render_fragment()
+            cache.set(key, fragment, list_cache.get_timeout())
+        return self.render_to_response(self.get_page_context(post_list_fragment=fragment))
+
+    def get_page_context(self, **kwargs):
+        return {'view': self, 'tag': self.get_tag(), **kwargs}
+
+
+class PostByTagListView(PostListView):
+    """PostListView for ``/tags/<slug>/``, sharing its fragment cache."""
+    template_name = 'blog/tag_posts.html'
+
+    def get(self, request, *args, **kwargs):
+        self.tag_stat = get_object_or_404(TagStat, slug=self.get_tag())
+        return super().get(request, *args, **kwargs)
+
+    def get_tag(self):
+        return self.kwargs['tag_slug'].lower()
+
+    def get_page_context(self, **kwargs):
+        return super().get_page_context(tag_name=self.tag_stat.name, tag_stat=self.tag_stat, **kwargs)
+
+@method_decorator(condition(etag_func=post_etag, last_modified_func=post_last_modified), name='dispatch')
 class PostDetailView(DetailView):
+    """
+    Post page with a fixed number of queries: post + author + profile, tags,
+    and one COUNT and one page query for comments (with their authors and
+    profiles joined), however many comments or tags the post has. Comments
+    are paginated with ``?comments_page=``.
+    """
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
+    comments_per_page = 50
+
+    def get_queryset(self):
+        return Post.objects.select_related('author__profile').prefetch_related('tags')
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx['comment_form'] = CommentForm()
-        ctx['comments'] = self.object.comments.select_related('author').all()
+        comments = self.object.comments.select_related('author__profile')
+        comments_page = Paginator(comments, self.comments_per_page).get_page(self.request.GET.get('comments_page'))
+        ctx['comments'] = comments_page
+        ctx['comments_page'] = comments_page
         return ctx
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -76,9 +205,12 @@ def register_view(request):
 
 @login_required
 def profile_view(request):
+    # request.user already has its profile joined in (blog.backends), so this
+    # only queries for users created before profiles existed.
+    profile = Profile.objects.for_user(request.user)
     if request.method == "POST":
         u_form = UserUpdateForm(request.POST, instance=request.user)
-        p_form = ProfileForm(request.POST, request.FILES, instance=request.user.profile)
+        p_form = ProfileForm(request.POST, request.FILES, instance=profile)
         if u_form.is_valid() and p_form.is_valid():
             u_form.save()
             p_form.save()
@@ -88,7 +220,7 @@ def profile_view(request):
             messages.error(request, "Please correct the errors below.")
     else:
         u_form = UserUpdateForm(instance=request.user)
-        p_form = ProfileForm(instance=request.user.profile)
+        p_form = ProfileForm(instance=profile)
 
     return render(request, "blog/profile.html", {"u_form": u_form, "p_form": p_form})
 
@@ -105,7 +237,10 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         post = get_object_or_404(Post, pk=post_pk)
         form.instance.post = post
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            Post.record_comment_added(post.pk, self.object.created_at)
+        return response
 
     def get_success_url(self):
         return self.object.post.get_absolute_url() + "#comment-{}".format(self.object.pk)
@@ -132,23 +267,39 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         comment = self.get_object()
         return comment.author == self.request.user
 
+    def form_valid(self, form):
+        with transaction.atomic():
+            response = super().form_valid(form)
+            Post.record_comment_removed(self.object.post_id)
+        return response
+
     def get_success_url(self):
         return self.object.post.get_absolute_url()
     
     # Search view
+SEARCH_RESULTS_PER_PAGE = 10
+
 def search_posts(request):
-    query = request.GET.get('q', '')
-    posts = Post.objects.all()
+    query = request.GET.get('q', '').strip()
     if query:
-        posts = posts.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
-    return render(request, 'blog/search_results.html', {'posts': posts, 'query': query})
+        posts = get_backend().search(query)
+    else:
+        posts = Post.objects.select_related('author')
+    page_obj = Paginator(posts, SEARCH_RESULTS_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'blog/search_results.html', {'posts': page_obj, 'page_obj': page_obj, 'query': query})
 
 # View posts by tag
-def posts_by_tag(request, tag_name):
-    posts = Post.objects.filter(tags__name__iexact=tag_name)
-    return render(request, 'blog/tag_posts.html', {'posts': posts, 'tag_name': tag_name})
+@condition(etag_func=post_list_etag)
+def posts_by_tag(request, tag_slug):
+    tag_stat = get_object_or_404(TagStat, slug=tag_slug.lower())
+    posts = Post.objects.filter(tags=tag_stat.tag_id).select_related('author')
+    return render(request, 'blog/tag_posts.html', {'posts': posts, 'tag_name': tag_stat.name})
+
+# Tag index, most used first (served from TagStat's popularity index)
+TAG_INDEX_LIMIT = 200
+
+@condition(etag_func=post_list_etag)
+def tag_index(request):
+    tags = TagStat.objects.filter(post_count__gt=0)[:TAG_INDEX_LIMIT]
+    return render(request, 'blog/tag_index.html', {'tags': tags})
 
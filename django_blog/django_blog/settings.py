@@ -37,8 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'blog'
-    
+    'blog',
     'taggit',
 ]
 
@@ -83,6 +82,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The blog list fragment cache works with any backend, e.g.
+# 'django.core.cache.backends.filebased.FileBasedCache' with a LOCATION dir.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'django-blog',
+    }
+}
+
+BLOG_LIST_CACHE_ALIAS = 'default'
+BLOG_LIST_CACHE_TIMEOUT = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -102,6 +117,14 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Session users are loaded with their blog profile in the same query.
+AUTHENTICATION_BACKENDS = [
+    'blog.backends.ProfileModelBackend',
+]
+
+LOGIN_URL = 'blog:login'
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -119,7 +142,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# User uploads (avatars)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Avatar thumbnails, see blog/avatars.py. 0 workers renders inline.
+BLOG_AVATAR_SIZES = (48, 96, 192)
+BLOG_AVATAR_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Tags differing only in case are one tag ("Django" and "django"), so tag
+# pages and TagStat counts cover every spelling.
+TAGGIT_CASE_INSENSITIVE = True
+
+# Full-text search backend for blog posts. Use
+# 'blog.search.DatabaseSearchBackend' on databases without SQLite FTS5.
+BLOG_SEARCH_BACKEND = 'blog.search.SQLiteFTS5Backend'